@@ -1,15 +1,17 @@
 import os
+import uuid
+import shutil
 import logging
 import json
 from fastapi import (
     APIRouter,
-    File,
-    UploadFile,
     HTTPException,
+    Request,
     WebSocket,
+    status,
 )
-from fastapi.responses import JSONResponse, FileResponse
-from src.tasks.document_parser_tasks import process_document
+from fastapi.responses import JSONResponse
+from src.tasks.document_parser_tasks import enqueue_process_document
 from celery.result import AsyncResult
 from fastapi import Depends
 from src.dependencies import get_db_manager
@@ -21,9 +23,14 @@ from api.models.knowledge_base import (
     KnowledgeBaseUpdate,
 )
 from api.services.knowledge_base import KnowledgeBaseService
-from typing import List
+from typing import List, Optional
 from src.constants import GlobalConfig
 from api.utils.websocket_manager import ws_manager
+from api.utils.upload import receive_upload_file
+from api.utils.file_response import RangeFileResponse
+from src.document_parser.transcript import format_timestamp, parse_timestamp
+from src.utils.clip_cache import get_clip_cache
+from src.utils.hls import hls_dir, PLAYLIST_FILE, SECTIONS_FILE
 from src.agents.quiz_agent import QuizAgent
 from api.models.assistant import AssistantResponse
 
@@ -47,16 +54,16 @@ def get_knowledge_base_id(
 
 @kb_router.post("/upload_document")
 async def upload_document(
-    file: UploadFile = File(...),
+    request: Request,
     knowledge_base_id: int = Depends(get_knowledge_base_id),
     db_manager: DatabaseManager = Depends(get_db_manager),
 ):
     # Define allowed file extensions
     ALLOWED_EXTENSIONS = GlobalConfig.ALLOWED_EXTENSIONS
 
-    try:
+    def upload_destination(file_name: str) -> str:
         # Check if the file extension is allowed
-        file_extension = os.path.splitext(file.filename)[1].lower()
+        file_extension = os.path.splitext(file_name)[1].lower()
         if file_extension not in ALLOWED_EXTENSIONS:
             raise HTTPException(
                 status_code=400,
@@ -65,7 +72,7 @@ async def upload_document(
 
         # Check if a file with the same name already exists in the database
         existing_document = db_manager.get_document_by_name(
-            knowledge_base_id, file.filename
+            knowledge_base_id, file_name
         )
         if existing_document:
             raise HTTPException(
@@ -73,31 +80,49 @@ async def upload_document(
                 detail="A file with this name already exists in the knowledge base",
             )
 
-        # Create a unique filename
-        unique_filename = file.filename
-
-        # Save the file
-        file_path = os.path.join(UPLOAD_DIR, unique_filename)
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
-        # Add document to database
-        document_id, document_type, documented_created = db_manager.add_document(
-            knowledge_base_id=knowledge_base_id,
-            file_name=unique_filename,
-            file_type=file_extension,
-            file_path=file_path,
-            status=DocumentStatus.UPLOADED,
-        )
+        # Create a unique filename: the same name may be uploaded to other knowledge bases
+        unique_filename = f"{uuid.uuid4().hex}_{os.path.basename(file_name)}"
+        return os.path.join(UPLOAD_DIR, unique_filename)
+
+    try:
+        # Stream the file to disk as the request body arrives, hashing it on the fly
+        upload = await receive_upload_file(request, upload_destination)
+        file_path = upload.path
+        file_extension = os.path.splitext(upload.filename)[1].lower()
+
+        try:
+            # Reject byte-identical copies of a document already in the knowledge base
+            duplicate_document = db_manager.get_document_by_hash(
+                knowledge_base_id, upload.content_hash
+            )
+            if duplicate_document:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"This file is identical to '{duplicate_document.file_name}' already in the knowledge base",
+                )
+
+            # Add document to database
+            document_id, document_type, documented_created = db_manager.add_document(
+                knowledge_base_id=knowledge_base_id,
+                file_name=upload.filename,
+                file_type=file_extension,
+                file_path=file_path,
+                status=DocumentStatus.UPLOADED,
+                file_size=upload.size,
+                content_hash=upload.content_hash,
+            )
+        except BaseException:
+            # Only this request's file, no other document references it yet
+            os.remove(file_path)
+            raise
 
         # Process the document asynchronously
-        # task = process_document.delay(file_path, document_id)
+        # task = enqueue_process_document(file_path, document_id)
 
         return JSONResponse(
             content={
                 "message": "File uploaded successfully",
-                "file_name": unique_filename,
+                "file_name": upload.filename,
                 "file_path": file_path,
                 "document_id": document_id,
                 "created_at": documented_created.isoformat(),
@@ -134,6 +159,13 @@ async def get_document_status(
         task_id = db_manager.get_document_task_id(document_id)
         if task_id:
             task_result = AsyncResult(task_id)
+            if (
+                task_result.successful()
+                and isinstance(task_result.result, dict)
+                and task_result.result.get("finalize_task_id")
+            ):
+                # Large documents are fanned out; follow the task that merges the parts
+                task_result = AsyncResult(task_result.result["finalize_task_id"])
             if task_result.state == "PROGRESS":
                 response["progress"] = task_result.info
             elif task_result.ready():
@@ -168,7 +200,7 @@ async def process_uploaded_document(
     db_manager.update_document_status(document_id, DocumentStatus.PROCESSING)
 
     # Start processing...
-    task = process_document.delay(document.file_path, document_id)
+    task = enqueue_process_document(document.file_path, document_id)
 
     # Store the task_id
     db_manager.set_document_task_id(document_id, task.id)
@@ -183,6 +215,62 @@ async def process_uploaded_document(
     )
 
 
+@kb_router.put("/update_document/{document_id}")
+async def update_document(
+    document_id: int,
+    request: Request,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+):
+    document = db_manager.get_document(document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    if document.status == DocumentStatus.PROCESSING:
+        raise HTTPException(
+            status_code=400, detail="Document is currently being processed"
+        )
+
+    # Receive the new version next to the stored file, which stays intact until it is replaced
+    upload_path = f"{document.file_path}.{uuid.uuid4().hex}.upload"
+
+    def upload_destination(file_name: str) -> str:
+        file_extension = os.path.splitext(file_name)[1].lower()
+        if file_extension != document.file_type:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File type must match the existing document ({document.file_type})",
+            )
+        return upload_path
+
+    try:
+        upload = await receive_upload_file(request, upload_destination)
+        if upload.content_hash == document.content_hash:
+            return JSONResponse(
+                content={"message": "Document is unchanged", "document_id": document_id},
+                status_code=200,
+            )
+        os.replace(upload_path, document.file_path)
+    finally:
+        if os.path.exists(upload_path):
+            os.remove(upload_path)
+    db_manager.update_document_file(document_id, upload.size, upload.content_hash)
+
+    db_manager.update_document_status(document_id, DocumentStatus.PROCESSING)
+
+    # Re-processing an indexed document only embeds the chunks that changed
+    task = enqueue_process_document(document.file_path, document_id)
+    db_manager.set_document_task_id(document_id, task.id)
+
+    return JSONResponse(
+        content={
+            "message": "Document re-indexing started",
+            "document_id": document_id,
+            "task_id": task.id,
+        },
+        status_code=202,
+    )
+
+
 @kb_router.get("/download_document/{document_id}")
 async def download_document(
     document_id: int, db_manager: DatabaseManager = Depends(get_db_manager)
@@ -195,11 +283,104 @@ async def download_document(
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found")
 
-    return FileResponse(
+    return RangeFileResponse(
         file_path, filename=document.file_name, media_type="application/octet-stream"
     )
 
 
+@kb_router.get("/document/{document_id}/transcript")
+async def get_document_transcript(
+    document_id: int,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+):
+    """Transcript of a video between ``start`` and ``end`` (``SS``, ``MM:SS`` or ``HH:MM:SS``)."""
+    document = db_manager.get_document(document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    try:
+        start_time = parse_timestamp(start) if start else None
+        end_time = parse_timestamp(end) if end else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    segments = db_manager.get_transcript_segments(document_id, start_time, end_time)
+    return JSONResponse(
+        content={
+            "document_id": document_id,
+            "start": start,
+            "end": end,
+            "text": " ".join(segment.text.strip() for segment in segments),
+            "segments": [
+                {
+                    "start": segment.start_time,
+                    "end": segment.end_time,
+                    "start_time": format_timestamp(segment.start_time),
+                    "end_time": format_timestamp(segment.end_time),
+                    "text": segment.text,
+                    "words": segment.words or [],
+                }
+                for segment in segments
+            ],
+        },
+        status_code=200,
+    )
+
+
+@kb_router.get("/document/{document_id}/clip")
+async def get_document_clip(
+    document_id: int,
+    start: str,
+    end: str,
+    db_manager: DatabaseManager = Depends(get_db_manager),
+):
+    """Section clip of a video between ``start`` and ``end``, cut on first request and cached."""
+    document = db_manager.get_document(document_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if os.path.splitext(document.file_path)[1].lower() not in GlobalConfig.MEDIA_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Clips are only available for media documents")
+    if not os.path.exists(document.file_path):
+        raise HTTPException(status_code=404, detail="File not found")
+
+    try:
+        clip_path = await get_clip_cache().get_clip(
+            document.file_path, parse_timestamp(start), parse_timestamp(end)
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return RangeFileResponse(clip_path)
+
+
+HLS_MEDIA_TYPES = {
+    ".m3u8": "application/vnd.apple.mpegurl",
+    ".ts": "video/mp2t",
+    ".json": "application/json",
+}
+
+
+@kb_router.get("/document/{document_id}/hls/{file_name}")
+async def get_document_hls(document_id: int, file_name: str):
+    """HLS playlist (``index.m3u8``), segments and ``sections.json`` of a packaged video."""
+    media_type = HLS_MEDIA_TYPES.get(os.path.splitext(file_name)[1])
+    if media_type is None or os.path.basename(file_name) != file_name:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    file_path = os.path.join(hls_dir(document_id), file_name)
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail="HLS stream not available")
+
+    if file_name in (PLAYLIST_FILE, SECTIONS_FILE):
+        # Rewritten when the document is re-ingested, always revalidate
+        cache_control = "no-cache"
+    else:
+        cache_control = f"public, max-age={GlobalConfig.HLS_CACHE_MAX_AGE}"
+    return RangeFileResponse(file_path, media_type=media_type, headers={"Cache-Control": cache_control})
+
+
 @kb_router.delete("/delete_document/{document_id}")
 async def delete_document(
     document_id: int, db_manager: DatabaseManager = Depends(get_db_manager)
@@ -211,6 +392,7 @@ async def delete_document(
     # Delete the file from the filesystem
     if os.path.exists(document.file_path):
         os.remove(document.file_path)
+    shutil.rmtree(hls_dir(document_id), ignore_errors=True)
 
     # Delete the document from the database
     db_manager.delete_document(document_id)
@@ -335,6 +517,26 @@ async def generate_course(
     finally:
         ws_manager.disconnect(websocket)
 
+@kb_router.websocket("/{knowledge_base_id}/progress")
+async def document_progress(
+    websocket: WebSocket,
+    knowledge_base_id: int,
+    current_user_id: int = Depends(get_current_user_id),
+    db_manager: DatabaseManager = Depends(get_db_manager),
+):
+    # Pushes throttled ingestion progress events published by the Celery workers
+    try:
+        db_manager.get_knowledge_base(knowledge_base_id, current_user_id)
+    except HTTPException:
+        # Only the owner of the knowledge base may follow its documents
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await ws_manager.connect(websocket)
+    try:
+        await ws_manager.stream_progress(websocket, knowledge_base_id)
+    finally:
+        ws_manager.disconnect(websocket)
+
 @kb_router.get("/{kb_id}/lessons/{lesson_id}/generate_quiz")
 async def generate_quiz(
     kb_id: int,
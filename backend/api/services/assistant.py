@@ -244,6 +244,7 @@ class AssistantService:
             "embedding_service": "openai",  # TODO: Let user choose embedding model
             "embedding_model_name": "text-embedding-3-small",
             "collection_name": f"kb_{assistant.knowledge_base_id}",
+            "knowledge_base_id": assistant.knowledge_base_id,
             "conversation_id": conversation_id,
             "system_prompt": assistant.systemprompt
         }
@@ -0,0 +1,139 @@
+import os
+import re
+import anyio
+from email.utils import formatdate
+from typing import Optional, Tuple
+from fastapi.responses import FileResponse
+from starlette.datastructures import Headers
+from starlette.types import Receive, Scope, Send
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFileResponse(FileResponse):
+    """``FileResponse`` that honours single byte-range requests.
+
+    Serves ``206 Partial Content`` for ``Range: bytes=start-end`` (including open and
+    suffix ranges), ``416`` for unsatisfiable ranges and ``304`` for a matching
+    ``If-None-Match``. ``If-Range`` falls back to the full file when the validator no
+    longer matches. The ETag is derived from the file size and mtime.
+
+    When the ASGI server supports the ``http.response.zerocopysend`` extension the
+    byte range is handed to it (sendfile), otherwise it is streamed in chunks.
+    """
+
+    def __init__(self, path: str, *args, **kwargs):
+        kwargs.setdefault("stat_result", os.stat(path))
+        super().__init__(path, *args, **kwargs)
+        self.headers["accept-ranges"] = "bytes"
+
+    def set_stat_headers(self, stat_result: os.stat_result) -> None:
+        self.file_size = stat_result.st_size
+        self.headers.setdefault("content-length", str(stat_result.st_size))
+        self.headers.setdefault("last-modified", formatdate(stat_result.st_mtime, usegmt=True))
+        self.headers.setdefault("etag", f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"')
+
+    def _requested_range(self, request_headers: Headers) -> Optional[Tuple[int, int]]:
+        """Inclusive ``(start, end)`` to serve, ``None`` for the whole file.
+
+        Raises:
+            ValueError: If the range cannot be satisfied.
+        """
+        range_header = request_headers.get("range")
+        if not range_header:
+            return None
+
+        if_range = request_headers.get("if-range")
+        if if_range and if_range not in (self.headers["etag"], self.headers["last-modified"]):
+            return None
+
+        # Multiple ranges are valid HTTP but not worth a multipart body here, serve the whole file
+        match = _RANGE_RE.match(range_header.strip())
+        if not match or match.groups() == ("", ""):
+            return None
+
+        first, last = match.groups()
+        if first == "":
+            # Suffix range: the last N bytes
+            length = int(last)
+            if length == 0 or self.file_size == 0:
+                raise ValueError("Range not satisfiable")
+            return max(self.file_size - length, 0), self.file_size - 1
+
+        start = int(first)
+        if last and int(last) < start:
+            # Syntactically invalid (RFC 7233 section 2.1), so the header is ignored
+            return None
+        if start >= self.file_size:
+            raise ValueError("Range not satisfiable")
+        end = min(int(last), self.file_size - 1) if last else self.file_size - 1
+        return start, end
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        send_header_only = scope["method"].upper() == "HEAD"
+
+        if request_headers.get("if-none-match") == self.headers["etag"]:
+            await self._send_empty(send, 304, exclude=("content-type", "content-disposition"))
+            return
+
+        try:
+            byte_range = self._requested_range(request_headers)
+        except ValueError:
+            self.headers["content-range"] = f"bytes */{self.file_size}"
+            await self._send_empty(send, 416, exclude=("content-type", "content-disposition"))
+            return
+
+        if byte_range is None:
+            start, end = 0, self.file_size - 1
+        else:
+            start, end = byte_range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{self.file_size}"
+            self.headers["content-length"] = str(end - start + 1)
+
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        count = end - start + 1
+        if send_header_only or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": start,
+                    "count": count,
+                    "more_body": False,
+                })
+        else:
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(start)
+                remaining = count
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    remaining -= len(chunk)
+                    await send({
+                        "type": "http.response.body",
+                        "body": chunk,
+                        "more_body": remaining > 0,
+                    })
+                if remaining > 0:
+                    # File shrank while being sent, close the body
+                    await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+        if self.background is not None:
+            await self.background()
+
+    async def _send_empty(self, send: Send, status_code: int, exclude: Tuple[str, ...] = ()) -> None:
+        exclude = ("content-length", *exclude)
+        headers = [(name, value) for name, value in self.raw_headers if name.decode("latin-1") not in exclude]
+        if status_code != 304:
+            headers.append((b"content-length", b"0"))
+        await send({"type": "http.response.start", "status": status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
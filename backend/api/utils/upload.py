@@ -0,0 +1,133 @@
+import os
+import hashlib
+import aiofiles
+import aiofiles.os
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+from fastapi import HTTPException, Request
+from multipart.multipart import MultipartParser, parse_options_header
+from src.constants import GlobalConfig
+
+# Room for the multipart boundaries and part headers around the file in Content-Length
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+@dataclass
+class ReceivedUpload:
+    filename: str
+    path: str
+    size: int
+    content_hash: str
+
+
+def _too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File too large. Maximum upload size is {max_size // (1024 * 1024)} MB",
+    )
+
+
+async def receive_upload_file(
+    request: Request,
+    destination: Callable[[str], str],
+    field_name: str = "file",
+    max_size: int = GlobalConfig.MAX_UPLOAD_SIZE_MB * 1024 * 1024,
+    chunk_size: int = GlobalConfig.UPLOAD_CHUNK_SIZE,
+) -> ReceivedUpload:
+    """Stream the ``field_name`` file of a multipart request body to disk.
+
+    The body is parsed as it arrives instead of being spooled by ``UploadFile``, so an
+    oversized upload is refused from its ``Content-Length`` or as soon as it passes
+    ``max_size``, before it is stored. ``destination`` maps the client's file name to
+    the path to write, and may raise ``HTTPException`` to reject the file before its
+    content is read. The file is written to a ``.part`` file next to the destination
+    and only moved into place once it is complete, so readers never see a partial
+    upload. The sha256 of the content is computed as bytes arrive.
+
+    Raises:
+        HTTPException: 413 if the upload exceeds ``max_size``, 400 if the body is not
+            multipart or has no file.
+    """
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > max_size + MULTIPART_OVERHEAD:
+        raise _too_large(max_size)
+
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload")
+
+    # The parser reports through synchronous callbacks, collect events and handle them
+    # (with async file writes) after each chunk of the body
+    events: List[Tuple[str, bytes]] = []
+    parser = MultipartParser(
+        params[b"boundary"],
+        {
+            "on_part_begin": lambda: events.append(("part_begin", b"")),
+            "on_header_field": lambda data, start, end: events.append(("header_field", data[start:end])),
+            "on_header_value": lambda data, start, end: events.append(("header_value", data[start:end])),
+            "on_header_end": lambda: events.append(("header_end", b"")),
+            "on_headers_finished": lambda: events.append(("headers_finished", b"")),
+            "on_part_data": lambda data, start, end: events.append(("part_data", data[start:end])),
+            "on_part_end": lambda: events.append(("part_end", b"")),
+        },
+    )
+
+    upload: Optional[ReceivedUpload] = None
+    partial_path = None
+    buffer = None
+    pending = bytearray()
+    sha256 = hashlib.sha256()
+    receiving = False
+    header_field, header_value, headers = b"", b"", {}
+    try:
+        async for body_chunk in request.stream():
+            parser.write(body_chunk)
+            for event, data in events:
+                if event == "part_begin":
+                    headers = {}
+                    header_field, header_value = b"", b""
+                elif event == "header_field":
+                    header_field += data
+                elif event == "header_value":
+                    header_value += data
+                elif event == "header_end":
+                    headers[header_field.lower()] = header_value
+                    header_field, header_value = b"", b""
+                elif event == "headers_finished":
+                    _, options = parse_options_header(headers.get(b"content-disposition", b""))
+                    if upload is None and options.get(b"name") == field_name.encode() and b"filename" in options:
+                        filename = options[b"filename"].decode("utf-8", errors="replace")
+                        upload = ReceivedUpload(filename=filename, path=destination(filename), size=0, content_hash="")
+                        partial_path = f"{upload.path}.part"
+                        buffer = await aiofiles.open(partial_path, "wb")
+                        receiving = True
+                elif event == "part_data" and receiving:
+                    upload.size += len(data)
+                    if upload.size > max_size:
+                        raise _too_large(max_size)
+                    sha256.update(data)
+                    pending += data
+                    if len(pending) >= chunk_size:
+                        await buffer.write(bytes(pending))
+                        pending.clear()
+                elif event == "part_end" and receiving:
+                    await buffer.write(bytes(pending))
+                    pending.clear()
+                    await buffer.close()
+                    buffer = None
+                    receiving = False
+            events.clear()
+        parser.finalize()
+
+        if upload is None or receiving:
+            raise HTTPException(status_code=400, detail=f"No complete '{field_name}' file in the upload")
+    except BaseException:
+        if buffer is not None:
+            await buffer.close()
+        if partial_path is not None and os.path.exists(partial_path):
+            await aiofiles.os.remove(partial_path)
+        raise
+
+    await aiofiles.os.replace(partial_path, upload.path)
+    upload.content_hash = sha256.hexdigest()
+    return upload
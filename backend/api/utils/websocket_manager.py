@@ -1,5 +1,7 @@
 import base64
 import json
+import asyncio
+import redis.asyncio as aioredis
 from fastapi import WebSocket
 from typing import Dict, Any, Optional, List
 from src.constants import GlobalConfig
@@ -10,6 +12,7 @@ from fastapi import WebSocketDisconnect
 from src.utils.stream import stream_output
 from src.agents.course_agent import CourseAgent
 from src.tools.kb_search_tool import SingleSourceNode
+from src.utils.progress import progress_channel
 
 # from src.utils.logger.logging import LogHandler
 import logging
@@ -224,5 +227,37 @@ class ConnectionManager:
             logging.error(f"Course generation failed: {str(e)}", exc_info=True)
             await self.send_error(websocket, f"Course generation failed: {str(e)}")
 
+    async def stream_progress(self, websocket: WebSocket, knowledge_base_id: int):
+        """Forward ingestion progress events of a knowledge base until the client disconnects."""
+        client = aioredis.Redis.from_url(GlobalConfig.PROGRESS_REDIS_URL)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(progress_channel(knowledge_base_id))
+
+        async def forward():
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is not None:
+                    await websocket.send_text(message["data"].decode("utf-8"))
+
+        async def wait_for_disconnect():
+            try:
+                while True:
+                    await websocket.receive_text()
+            except WebSocketDisconnect:
+                pass
+
+        tasks = [asyncio.create_task(forward()), asyncio.create_task(wait_for_disconnect())]
+        try:
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+            for task in done:
+                if not task.cancelled() and task.exception() and not isinstance(task.exception(), WebSocketDisconnect):
+                    logging.error(f"Progress stream failed: {task.exception()}")
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+            await client.aclose()
+
 
 ws_manager = ConnectionManager()
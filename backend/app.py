@@ -5,10 +5,11 @@ from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 from celery.result import AsyncResult
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse
 from fastapi import FastAPI, HTTPException
 
 from src.constants import GlobalConfig
+from api.utils.file_response import RangeFileResponse
 from api.routes.knowledge_base import kb_router
 from api.routes.assistant import assistant_router
 from api.routes.auth import router as auth_router
@@ -69,8 +70,8 @@ async def get_file(file_path: str):
     if not os.path.abspath(full_path).startswith(os.path.abspath(base_dir)):
         raise HTTPException(status_code=403, detail="Access forbidden")
     
-    # Return the file
-    return FileResponse(full_path)
+    # Return the file, honouring Range requests so players can seek
+    return RangeFileResponse(full_path)
 
 
 app.add_middleware(
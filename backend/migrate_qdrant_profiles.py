@@ -0,0 +1,19 @@
+import argparse
+from src.constants import GlobalConfig
+from src.dependencies import get_vector_db
+from src.database.vector_store import QdrantVectorDB
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Apply the Qdrant profiles from config.yaml to existing collections.")
+    parser.add_argument("collections", nargs="*", help="Collection names such as kb_1 (default: all)")
+    args = parser.parse_args()
+
+    vector_db = get_vector_db()
+    if not isinstance(vector_db, QdrantVectorDB):
+        raise SystemExit(f"MODEL.VECTOR_STORE is {GlobalConfig.MODEL.VECTOR_STORE}, expected qdrant")
+
+    migrated = vector_db.migrate_collections(args.collections or None)
+    for collection_name in migrated:
+        print(f"Migrated collection: {collection_name}")
+    print(f"{len(migrated)} collection(s) updated")
@@ -0,0 +1,30 @@
+import os
+import argparse
+from src.constants import GlobalConfig
+from src.dependencies import get_vector_db
+from src.database.ivf_vector_store import IVFVectorDB
+
+
+def rebuild_vector_index(collection_names, nlist=None):
+    """Compact and retrain the IVF index of the given collections (all when empty)."""
+    vector_db = get_vector_db()
+    if not isinstance(vector_db, IVFVectorDB):
+        raise SystemExit(f"MODEL.VECTOR_STORE is {GlobalConfig.MODEL.VECTOR_STORE}, expected ivf")
+
+    if not collection_names:
+        collection_names = sorted(
+            name for name in os.listdir(vector_db.root_dir)
+            if os.path.isdir(os.path.join(vector_db.root_dir, name))
+        )
+    for collection_name in collection_names:
+        vector_db.rebuild(collection_name, nlist=nlist)
+        print(f"Rebuilt index: {collection_name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retrain the IVF index of local vector collections.")
+    parser.add_argument("collections", nargs="*", help="Collection names such as kb_1 (default: all)")
+    parser.add_argument("--nlist", type=int, default=None, help="Number of inverted lists (default: IVF_NLIST)")
+    args = parser.parse_args()
+
+    rebuild_vector_index(args.collections, nlist=args.nlist)
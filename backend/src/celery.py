@@ -1,5 +1,6 @@
 import os
 from celery import Celery
+from kombu import Queue
 
 from src.constants import GlobalConfig
 
@@ -9,6 +10,37 @@ from src.constants import GlobalConfig
 # env_stage = int(os.getenv('ENV_STAGE', '1'))
 # queue_name = os.getenv('QUEUE_NAME', 'bachngo_kb_worker_local')
 
+PROCESS_DOCUMENT_TASK = "src.tasks.document_parser_tasks.process_document"
+PROCESS_DOCUMENT_RANGE_TASK = "src.tasks.document_parser_tasks.process_document_range"
+
+# Per-queue task options, applied when a document is dispatched
+INGEST_QUEUE_OPTIONS = {
+    GlobalConfig.INGEST_TEXT_QUEUE: {
+        "soft_time_limit": GlobalConfig.INGEST_TEXT_SOFT_TIME_LIMIT,
+        "time_limit": GlobalConfig.INGEST_TEXT_TIME_LIMIT,
+    },
+    GlobalConfig.INGEST_MEDIA_QUEUE: {
+        "soft_time_limit": GlobalConfig.INGEST_MEDIA_SOFT_TIME_LIMIT,
+        "time_limit": GlobalConfig.INGEST_MEDIA_TIME_LIMIT,
+    },
+}
+
+
+def ingest_queue_for(file_path: str) -> str:
+    file_extension = os.path.splitext(file_path)[1].lower()
+    if file_extension in GlobalConfig.MEDIA_EXTENSIONS:
+        return GlobalConfig.INGEST_MEDIA_QUEUE
+    return GlobalConfig.INGEST_TEXT_QUEUE
+
+
+def route_task(name, args, kwargs, options, task=None, **kw):
+    # Route ingestion by file type so long media jobs never block text documents
+    if name in (PROCESS_DOCUMENT_TASK, PROCESS_DOCUMENT_RANGE_TASK):
+        file_path = args[0] if args else kwargs.get("file_path", "")
+        return {"queue": ingest_queue_for(file_path)}
+    return None
+
+
 celery = Celery(
     "document_parser",
     broker=GlobalConfig.CELERY_BROKER_URL,
@@ -26,4 +58,16 @@ celery.conf.update(
     accept_content=["json"],
     timezone="UTC",
     enable_utc=True,
+    task_default_queue=GlobalConfig.CELERY_QUEUE_NAME,
+    task_queues=(
+        Queue(GlobalConfig.CELERY_QUEUE_NAME),
+        Queue(GlobalConfig.INGEST_TEXT_QUEUE),
+        Queue(GlobalConfig.INGEST_MEDIA_QUEUE),
+    ),
+    task_routes=(route_task,),
+    # Re-running ingestion re-indexes incrementally (fan-out parts replace their own chunk
+    # range), so tasks are acknowledged only once done and a crashed worker does not lose
+    # a long media job
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
 )
@@ -15,6 +15,9 @@ MODEL_ID = cfg.MODEL.MODEL_ID
 # Embeddings
 EMBEDDING_SERVICE = cfg.MODEL.EMBEDDING_SERVICE
 EMBEDDING_MODEL_NAME = cfg.MODEL.EMBEDDING_MODEL_NAME 
+EMBEDDING_BATCH_SIZE = cfg.MODEL.get("EMBEDDING_BATCH_SIZE", 256)
+EMBEDDING_MAX_TOKENS_PER_BATCH = cfg.MODEL.get("EMBEDDING_MAX_TOKENS_PER_BATCH", 200000)
+EMBEDDING_CONCURRENCY = cfg.MODEL.get("EMBEDDING_CONCURRENCY", 4)
 
 
 class ModelConfig: 
@@ -24,6 +27,9 @@ class ModelConfig:
     MODEL_ID = MODEL_ID
     EMBEDDING_SERVICE = EMBEDDING_SERVICE
     EMBEDDING_MODEL_NAME = EMBEDDING_MODEL_NAME
+    EMBEDDING_BATCH_SIZE = EMBEDDING_BATCH_SIZE
+    EMBEDDING_MAX_TOKENS_PER_BATCH = EMBEDDING_MAX_TOKENS_PER_BATCH
+    EMBEDDING_CONCURRENCY = EMBEDDING_CONCURRENCY
     OTHER_KWARGS = cfg
     
     OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
@@ -47,10 +53,69 @@ class ModelConfig:
 class GlobalConfig:
     MODEL = ModelConfig
     DATABASE_PATH = "./DB/knowledge_base.db"
-    ALLOWED_EXTENSIONS = {'.docx', '.hwp','.pdf','.epub','.txt','.html','.htm','.ipynb','.md', '.mbox', '.pptx', '.csv', '.xml', '.rtf', '.mp4'}
+    # Vector store collection schemas shared by API and worker processes
+    VECTOR_REGISTRY_PATH = os.getenv("VECTOR_REGISTRY_PATH", "./DB/vector_collections.db")
+    EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "./DB/embedding_cache.db")
+    EMBEDDING_CACHE_MAX_SIZE_MB = int(os.getenv("EMBEDDING_CACHE_MAX_SIZE_MB", 2048))
+    ALLOWED_EXTENSIONS = {'.docx', '.hwp','.pdf','.epub','.txt','.html','.htm','.ipynb','.md', '.mbox', '.pptx', '.csv', '.xml', '.rtf', '.mp4', '.mp3', '.m4a', '.wav', '.ogg'}
+    MEDIA_EXTENSIONS = {'.mp4', '.mp3', '.m4a', '.wav', '.ogg'}
     MAX_CONCURRENT_REQUESTS = 5
     
+    # Video/audio transcription
+    TRANSCRIPTION_CONCURRENCY = int(os.getenv("TRANSCRIPTION_CONCURRENCY", MAX_CONCURRENT_REQUESTS))
+    TRANSCRIPTION_MAX_RETRIES = int(os.getenv("TRANSCRIPTION_MAX_RETRIES", 5))
+    TRANSCRIPTION_CHUNK_SECONDS = int(os.getenv("TRANSCRIPTION_CHUNK_SECONDS", 100))
+    TRANSCRIPTION_AUDIO_FORMAT = os.getenv("TRANSCRIPTION_AUDIO_FORMAT", "mp3")
+    TRANSCRIPTION_AUDIO_BITRATE = os.getenv("TRANSCRIPTION_AUDIO_BITRATE", "32k")
+    # Recordings longer than one window are summarized window by window, then merged
+    SUMMARY_WINDOWED = os.getenv("SUMMARY_WINDOWED", "true").lower() == "true"
+    SUMMARY_WINDOW_SECONDS = int(os.getenv("SUMMARY_WINDOW_SECONDS", 1200))
+    SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", 3))
+    SUMMARY_MAX_RETRIES = int(os.getenv("SUMMARY_MAX_RETRIES", 3))
+    CHUNK_WRITE_BATCH_SIZE = int(os.getenv("CHUNK_WRITE_BATCH_SIZE", 1024))
+    # Points per vector store upsert and how many Qdrant upserts are kept in flight
+    VECTOR_UPSERT_BATCH_SIZE = int(os.getenv("VECTOR_UPSERT_BATCH_SIZE", 512))
+    VECTOR_UPSERT_PARALLELISM = int(os.getenv("VECTOR_UPSERT_PARALLELISM", 4))
+    # In-process backend used when MODEL.VECTOR_STORE is "flat"
+    FLAT_VECTOR_DIR = os.getenv("FLAT_VECTOR_DIR", "./DB/flat_vectors")
+    FLAT_VECTOR_DTYPE = os.getenv("FLAT_VECTOR_DTYPE", "float32")  # [float32, float16]
+    # Approximate index over the same files when MODEL.VECTOR_STORE is "ivf"
+    IVF_NLIST = int(os.getenv("IVF_NLIST", 0))  # 0 = 4 * sqrt(collection size)
+    IVF_NPROBE = int(os.getenv("IVF_NPROBE", 16))
+    IVF_QUANTIZER = os.getenv("IVF_QUANTIZER", "int8")  # [int8, pq]
+    IVF_PQ_M = int(os.getenv("IVF_PQ_M", 0))  # 0 = dimension / 4
+    IVF_RESCORE = os.getenv("IVF_RESCORE", "true").lower() == "true"
+    IVF_RESCORE_FACTOR = int(os.getenv("IVF_RESCORE_FACTOR", 4))
+    IVF_MIN_TRAIN_ROWS = int(os.getenv("IVF_MIN_TRAIN_ROWS", 10000))
+    # Near-duplicate chunks (MinHash over word shingles) share the first copy's vector
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_SCOPE = os.getenv("DEDUP_SCOPE", "document")  # [document, knowledge_base]
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.9))
+    DEDUP_NUM_PERM = int(os.getenv("DEDUP_NUM_PERM", 64))
+    DEDUP_BANDS = int(os.getenv("DEDUP_BANDS", 16))
+    STREAMING_INGESTION = os.getenv("STREAMING_INGESTION", "true").lower() == "true"
+    STREAMING_QUEUE_SIZE = int(os.getenv("STREAMING_QUEUE_SIZE", 2))
+    # Documents with at least this many pages are split into parallel Celery subtasks
+    FANOUT_MIN_PAGES = int(os.getenv("FANOUT_MIN_PAGES", 200))
+    FANOUT_PAGES_PER_TASK = int(os.getenv("FANOUT_PAGES_PER_TASK", 100))
+    
+    # PDF extraction
+    PDF_BACKEND = os.getenv("PDF_BACKEND", "pypdf")  # [pypdf, pymupdf]
+    PDF_EXTRACTION_WORKERS = int(os.getenv("PDF_EXTRACTION_WORKERS", os.cpu_count() or 1))
+    PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 16))
+    
     UPLOAD_FOLDER = "./uploads"
+    # Section clips are cut on first request and kept in a bounded LRU cache, served by /getfile
+    CLIP_CACHE_DIR = os.getenv("CLIP_CACHE_DIR", "./uploads/clips")
+    CLIP_CACHE_MAX_SIZE_MB = int(os.getenv("CLIP_CACHE_MAX_SIZE_MB", 2048))
+    # Optional HLS packaging of ingested videos, served by /document/{id}/hls/
+    HLS_ENABLED = os.getenv("HLS_ENABLED", "false").lower() == "true"
+    HLS_DIR = os.getenv("HLS_DIR", "./uploads/hls")
+    HLS_SEGMENT_SECONDS = int(os.getenv("HLS_SEGMENT_SECONDS", 6))
+    HLS_CACHE_MAX_AGE = int(os.getenv("HLS_CACHE_MAX_AGE", 86400))
+    UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+    MAX_UPLOAD_SIZE_MB = int(os.getenv("MAX_UPLOAD_SIZE_MB", 4096))
     END_TOKEN = "<END>"
     
     # logging configuration variable
@@ -74,5 +139,24 @@ class GlobalConfig:
     CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://localhost:6379/0")
     CELERY_BACKEND_URL = os.getenv("CELERY_BACKEND_URL", "redis://localhost:6379/0")
     
+    # ingestion queues: quick text documents and long-running audio/video are routed separately
+    # (worker concurrency and prefetch are set in start_celery.sh)
+    INGEST_TEXT_QUEUE = "ingest.text"
+    INGEST_TEXT_SOFT_TIME_LIMIT = int(os.getenv("INGEST_TEXT_SOFT_TIME_LIMIT", 30 * 60))
+    INGEST_TEXT_TIME_LIMIT = int(os.getenv("INGEST_TEXT_TIME_LIMIT", 35 * 60))
+    
+    INGEST_MEDIA_QUEUE = "ingest.media"
+    INGEST_MEDIA_SOFT_TIME_LIMIT = int(os.getenv("INGEST_MEDIA_SOFT_TIME_LIMIT", 3 * 60 * 60))
+    INGEST_MEDIA_TIME_LIMIT = int(os.getenv("INGEST_MEDIA_TIME_LIMIT", 3 * 60 * 60 + 5 * 60))
+    
+    # ingestion progress events (Redis pub/sub)
+    PROGRESS_REDIS_URL = os.getenv("PROGRESS_REDIS_URL", CELERY_BROKER_URL)
+    PROGRESS_EVERY_N_CHUNKS = int(os.getenv("PROGRESS_EVERY_N_CHUNKS", 256))
+    PROGRESS_INTERVAL_MS = int(os.getenv("PROGRESS_INTERVAL_MS", 1000))
+    
     # VectorDB
-    QDRANT_DB_URL = os.getenv("QDRANT_DB_URL", "http://localhost:6333") 
+    QDRANT_DB_URL = os.getenv("QDRANT_DB_URL", "http://localhost:6333")
+    # Per-collection storage/index/search profiles, see QDRANT in config.yaml
+    QDRANT_PROFILES = (cfg.get("QDRANT") or {}).get("PROFILES") or {}
+    QDRANT_DEFAULT_PROFILE = (cfg.get("QDRANT") or {}).get("DEFAULT_PROFILE", "default")
+    QDRANT_COLLECTION_PROFILES = (cfg.get("QDRANT") or {}).get("COLLECTIONS") or {} 
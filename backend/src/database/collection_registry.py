@@ -0,0 +1,52 @@
+import os
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class CollectionRegistry:
+    """Vector store collection schemas (vector size, distance, payload indexes) shared across processes.
+
+    Backed by a SQLite file in WAL mode next to the application database, so API
+    and Celery worker processes only ask the vector store about a collection the
+    first time any of them sees it. Entries are keyed by the store URL as well, so
+    several stores can share one file.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS collections (
+                    store TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    schema TEXT NOT NULL,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (store, name)
+                )
+                """
+            )
+
+    def get(self, store: str, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT schema FROM collections WHERE store = ? AND name = ?", (store, name)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, store: str, name: str, schema: Dict[str, Any]):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO collections (store, name, schema, updated_at) VALUES (?, ?, ?, ?)",
+                (store, name, json.dumps(schema), time.time()),
+            )
+
+    def delete(self, store: str, name: str):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM collections WHERE store = ? AND name = ?", (store, name))
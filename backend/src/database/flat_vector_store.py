@@ -0,0 +1,309 @@
+import os
+import json
+import fcntl
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+import numpy as np
+from src.database.vector_store import VectorDB
+
+# Rows scored per matrix-vector product, bounds the float32 scratch memory of a search
+SEARCH_BLOCK_ROWS = 65536
+# Compact a collection once this fraction of its rows is deleted
+DEFAULT_COMPACT_RATIO = 0.3
+
+
+@dataclass
+class FlatSearchHit:
+    """Search result with the same shape as Qdrant's ``ScoredPoint``."""
+    id: str
+    score: float
+    payload: Dict[str, Any]
+
+
+class FlatCollection:
+    """One collection on disk: an append-only vector matrix plus a SQLite sidecar.
+
+    ``vectors.<generation>.bin`` holds L2-normalized rows of ``dim`` values in
+    ``dtype`` and is memory-mapped for search. ``sidecar.db`` maps each row to its
+    vector id and payload and records deletions. Writers from any process take an
+    exclusive file lock; every write bumps a version that readers check before
+    searching, so a long-lived process picks up rows written by Celery workers.
+    Compaction writes a new generation file, so open memory maps stay valid.
+    """
+
+    def __init__(self, path: str, dtype: np.dtype):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(path, "sidecar.db"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS points (
+                    row INTEGER PRIMARY KEY,
+                    vector_id TEXT NOT NULL UNIQUE,
+                    payload TEXT,
+                    deleted INTEGER NOT NULL DEFAULT 0
+                )
+                """
+            )
+            self._conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._conn.execute(
+                "INSERT OR IGNORE INTO state (key, value) VALUES ('version', '0'), ('generation', '0'), ('dtype', ?)",
+                (np.dtype(dtype).name,),
+            )
+        self.dtype = np.dtype(self._state("dtype"))
+        self._loaded_version = None
+        self._matrix: Optional[np.ndarray] = None
+        self._deleted: Optional[np.ndarray] = None
+
+    def _state(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_state(self, key: str, value):
+        self._conn.execute("INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _bump_version(self):
+        self._conn.execute("UPDATE state SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'")
+
+    def _vectors_path(self, generation) -> str:
+        return os.path.join(self.path, f"vectors.{generation}.bin")
+
+    @property
+    def dim(self) -> Optional[int]:
+        dim = self._state("dim")
+        return int(dim) if dim is not None else None
+
+    @contextmanager
+    def _write_lock(self):
+        with self._thread_lock, open(os.path.join(self.path, "write.lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _row_count(self) -> int:
+        return self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM points").fetchone()[0]
+
+    def _normalize(self, vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add(self, vector_ids: List[str], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
+        matrix = self._normalize(np.asarray(vectors, dtype=np.float32)).astype(self.dtype)
+        with self._write_lock():
+            dim = self.dim
+            if dim is None:
+                dim = matrix.shape[1]
+                with self._conn:
+                    self._set_state("dim", dim)
+            if matrix.shape[1] != dim:
+                raise ValueError(f"Collection {os.path.basename(self.path)} stores {dim}-d vectors, got {matrix.shape[1]}-d")
+
+            start = self._row_count()
+            vectors_path = self._vectors_path(self._state("generation"))
+            with open(vectors_path, "ab") as f:
+                # Drop rows a crashed writer appended without committing their sidecar entries
+                f.truncate(start * dim * self.dtype.itemsize)
+                f.write(matrix.tobytes())
+
+            with self._conn:
+                # Upsert semantics: a re-added id replaces its previous row
+                self._conn.executemany(
+                    "UPDATE points SET deleted = 1 WHERE vector_id = ?",
+                    [(vector_id,) for vector_id in vector_ids],
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO points (row, vector_id, payload, deleted) VALUES (?, ?, ?, 0)",
+                    [
+                        (start + i, vector_id, json.dumps(payload))
+                        for i, (vector_id, payload) in enumerate(zip(vector_ids, payloads))
+                    ],
+                )
+                self._bump_version()
+
+    def delete(self, vector_ids: List[str]) -> float:
+        """Mark rows deleted and return the fraction of deleted rows."""
+        with self._write_lock():
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE points SET deleted = 1 WHERE vector_id = ?",
+                    [(vector_id,) for vector_id in vector_ids],
+                )
+                self._bump_version()
+            total, deleted = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(deleted), 0) FROM points"
+            ).fetchone()
+        return deleted / total if total else 0.0
+
+    def update_payloads(self, vector_ids: List[str], payloads: List[Dict[str, Any]]):
+        # Payloads are read from the sidecar per search, the loaded matrix stays valid
+        with self._write_lock():
+            with self._conn:
+                self._conn.executemany(
+                    "UPDATE points SET payload = ? WHERE vector_id = ? AND deleted = 0",
+                    [(json.dumps(payload), vector_id) for vector_id, payload in zip(vector_ids, payloads)],
+                )
+
+    def compact(self):
+        """Rewrite the matrix without deleted rows and renumber the sidecar."""
+        with self._write_lock():
+            dim = self.dim
+            generation = int(self._state("generation"))
+            live = self._conn.execute(
+                "SELECT row, vector_id, payload FROM points WHERE deleted = 0 ORDER BY row"
+            ).fetchall()
+            if dim is None:
+                return
+
+            old_path = self._vectors_path(generation)
+            new_path = self._vectors_path(generation + 1)
+            old = np.memmap(old_path, dtype=self.dtype, mode="r", shape=(self._row_count(), dim)) if live else None
+            with open(new_path, "wb") as f:
+                for block_start in range(0, len(live), SEARCH_BLOCK_ROWS):
+                    rows = [row for row, _, _ in live[block_start:block_start + SEARCH_BLOCK_ROWS]]
+                    f.write(np.ascontiguousarray(old[rows]).tobytes())
+            del old
+
+            with self._conn:
+                self._conn.execute("DELETE FROM points")
+                self._conn.executemany(
+                    "INSERT INTO points (row, vector_id, payload, deleted) VALUES (?, ?, ?, 0)",
+                    [(i, vector_id, payload) for i, (_, vector_id, payload) in enumerate(live)],
+                )
+                self._set_state("generation", generation + 1)
+                self._bump_version()
+            # Processes still mapping the old generation keep their view until they reload
+            os.remove(old_path)
+            logging.info(f"Compacted {self.path} to {len(live)} rows")
+
+    def _refresh(self):
+        version = self._state("version")
+        if version == self._loaded_version:
+            return
+        dim = self.dim
+        count = self._row_count()
+        if dim is None or count == 0:
+            self._matrix = np.empty((0, dim or 0), dtype=self.dtype)
+            self._deleted = np.zeros(0, dtype=bool)
+        else:
+            self._matrix = np.memmap(
+                self._vectors_path(self._state("generation")), dtype=self.dtype, mode="r", shape=(count, dim)
+            )
+            self._deleted = np.ones(count, dtype=bool)
+            live_rows = [row for (row,) in self._conn.execute("SELECT row FROM points WHERE deleted = 0")]
+            self._deleted[live_rows] = False
+        self._loaded_version = version
+
+    def _snapshot(self):
+        with self._thread_lock:
+            self._refresh()
+            return self._matrix, self._deleted
+
+    def _hits(self, rows: np.ndarray, scores: np.ndarray) -> List[FlatSearchHit]:
+        """Look up ids and payloads of ``rows``, already ordered by ``scores``."""
+        placeholders = ",".join("?" * len(rows))
+        points = {
+            row: (vector_id, payload)
+            for row, vector_id, payload in self._conn.execute(
+                f"SELECT row, vector_id, payload FROM points WHERE row IN ({placeholders})",
+                [int(row) for row in rows],
+            )
+        }
+        return [
+            FlatSearchHit(id=points[row][0], score=float(score), payload=json.loads(points[row][1]))
+            for row, score in zip(map(int, rows), scores)
+            if row in points
+        ]
+
+    def search(self, query_vector: List[float], limit: int) -> List[FlatSearchHit]:
+        matrix, deleted = self._snapshot()
+        if len(matrix) == 0 or limit <= 0:
+            return []
+
+        query = self._normalize(np.asarray([query_vector], dtype=np.float32))[0]
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), SEARCH_BLOCK_ROWS):
+            block = matrix[start:start + SEARCH_BLOCK_ROWS]
+            scores[start:start + len(block)] = block.astype(np.float32, copy=False) @ query
+        scores[deleted] = -np.inf
+
+        k = min(limit, int((~deleted).sum()))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return self._hits(top, scores[top])
+
+
+class FlatVectorDB(VectorDB):
+    """In-process exact-search backend: one memory-mapped matrix per collection under ``root_dir``.
+
+    Vectors are stored normalized, so scores are cosine similarities like the
+    default Qdrant collections. Needs no external service; intended for small
+    deployments and tests.
+    """
+
+    def __init__(self, root_dir: str, dtype: str = "float32", compact_ratio: float = DEFAULT_COMPACT_RATIO):
+        if np.dtype(dtype) not in (np.float32, np.float16):
+            raise ValueError("FlatVectorDB supports float32 and float16 storage")
+        self.root_dir = root_dir
+        self.dtype = np.dtype(dtype)
+        self.compact_ratio = compact_ratio
+        self.collections: Dict[str, FlatCollection] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root_dir, exist_ok=True)
+
+    def _collection(self, collection_name: str, create: bool = True) -> Optional[FlatCollection]:
+        with self._lock:
+            if collection_name not in self.collections:
+                path = os.path.join(self.root_dir, collection_name)
+                if not create and not os.path.exists(os.path.join(path, "sidecar.db")):
+                    return None
+                self.collections[collection_name] = self._open_collection(path)
+            return self.collections[collection_name]
+
+    def _open_collection(self, path: str) -> FlatCollection:
+        return FlatCollection(path, self.dtype)
+
+    def create_collection(self, collection_name: str, vector_size: Optional[int] = None):
+        self._collection(collection_name)
+
+    def add_vector(self, collection_name: str, vector_id: str, vector: List[float], payload: Dict[str, Any]):
+        self.add_vectors(collection_name, [vector_id], [vector], [payload])
+
+    def add_vectors(self, collection_name: str, vector_ids: List[str], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
+        if not vectors:
+            return
+        self._collection(collection_name).add(vector_ids, vectors, payloads)
+
+    def delete_vectors(self, collection_name: str, vector_ids: List[str]):
+        collection = self._collection(collection_name, create=False) if vector_ids else None
+        if collection is None:
+            return
+        if collection.delete(vector_ids) >= self.compact_ratio:
+            collection.compact()
+
+    def update_payloads(self, collection_name: str, vector_ids: List[str], payloads: List[Dict[str, Any]]):
+        collection = self._collection(collection_name, create=False) if vector_ids else None
+        if collection is not None:
+            collection.update_payloads(vector_ids, payloads)
+
+    def compact(self, collection_name: str):
+        collection = self._collection(collection_name, create=False)
+        if collection is not None:
+            collection.compact()
+
+    def search_vectors(self, collection_name: str, query_vector: List[float], limit: int):
+        collection = self._collection(collection_name, create=False)
+        if collection is None:
+            raise ValueError(f"Collection {collection_name} has not been initialized.")
+        return collection.search(query_vector, limit)
@@ -0,0 +1,354 @@
+import os
+import uuid
+import logging
+import threading
+from typing import Any, Dict, List, Optional
+import numpy as np
+from src.database.flat_vector_store import (
+    DEFAULT_COMPACT_RATIO,
+    SEARCH_BLOCK_ROWS,
+    FlatCollection,
+    FlatSearchHit,
+    FlatVectorDB,
+)
+
+MODEL_FILE = "ivf_model.npz"
+CODES_FILE = "ivf_codes.npz"
+# Enough training points per centroid for k-means, without scanning huge collections
+TRAIN_POINTS_PER_CENTROID = 64
+MAX_TRAIN_ROWS = 100000
+
+
+def _nearest(data: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the nearest centroid (euclidean) for every row of ``data``."""
+    half_norms = 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+    assignments = np.empty(len(data), dtype=np.int32)
+    for start in range(0, len(data), SEARCH_BLOCK_ROWS):
+        block = np.asarray(data[start:start + SEARCH_BLOCK_ROWS], dtype=np.float32)
+        assignments[start:start + len(block)] = np.argmax(block @ centroids.T - half_norms, axis=1)
+    return assignments
+
+
+def kmeans(data: np.ndarray, k: int, iterations: int = 20, seed: int = 0) -> np.ndarray:
+    """Lloyd's k-means; empty clusters are re-seeded with random points."""
+    rng = np.random.default_rng(seed)
+    k = min(k, len(data))
+    centroids = data[rng.choice(len(data), k, replace=False)].astype(np.float32)
+    for _ in range(iterations):
+        assignments = _nearest(data, centroids)
+        counts = np.bincount(assignments, minlength=k)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignments, data)
+        empty = counts == 0
+        centroids[~empty] = sums[~empty] / counts[~empty, None]
+        if empty.any():
+            centroids[empty] = data[rng.choice(len(data), int(empty.sum()), replace=False)]
+    return centroids
+
+
+class ScalarQuantizer:
+    """int8 per-dimension quantization of residuals: one byte per dimension, 4x smaller than float32."""
+
+    kind = "int8"
+
+    def __init__(self, offset: Optional[np.ndarray] = None, scale: Optional[np.ndarray] = None):
+        self.offset = offset
+        self.scale = scale
+
+    def train(self, residuals: np.ndarray):
+        low, high = residuals.min(axis=0), residuals.max(axis=0)
+        self.offset = low.astype(np.float32)
+        self.scale = np.where(high > low, (high - low) / 255.0, 1.0).astype(np.float32)
+
+    def encode(self, residuals: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint((residuals - self.offset) / self.scale), 0, 255).astype(np.uint8)
+
+    def scores(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        # <q, offset + scale * code> without decoding the codes
+        return codes.astype(np.float32) @ (self.scale * query) + float(self.offset @ query)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"offset": self.offset, "scale": self.scale}
+
+
+class ProductQuantizer:
+    """Product quantization of residuals: ``m`` sub-vectors, one byte (256 centroids) each."""
+
+    kind = "pq"
+
+    def __init__(self, m: int, codebooks: Optional[np.ndarray] = None):
+        self.m = m
+        self.codebooks = codebooks  # (m, 256, dim // m)
+
+    def train(self, residuals: np.ndarray):
+        dim = residuals.shape[1]
+        if dim % self.m:
+            raise ValueError(f"PQ sub-vector count {self.m} must divide the dimension {dim}")
+        sub = residuals.reshape(len(residuals), self.m, dim // self.m)
+        codebooks = np.zeros((self.m, 256, dim // self.m), dtype=np.float32)
+        for j in range(self.m):
+            trained = kmeans(sub[:, j], 256, iterations=10, seed=j)
+            codebooks[j, :len(trained)] = trained
+        self.codebooks = codebooks
+
+    def encode(self, residuals: np.ndarray) -> np.ndarray:
+        sub = residuals.reshape(len(residuals), self.m, -1)
+        return np.stack([_nearest(sub[:, j], self.codebooks[j]) for j in range(self.m)], axis=1).astype(np.uint8)
+
+    def scores(self, query: np.ndarray, codes: np.ndarray) -> np.ndarray:
+        # Asymmetric distance: per sub-space lookup table of <q_j, codeword>
+        lookup = np.einsum("mkd,md->mk", self.codebooks, query.reshape(self.m, -1))
+        return lookup[np.arange(self.m), codes].sum(axis=1)
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"codebooks": self.codebooks}
+
+
+def default_pq_m(dim: int) -> int:
+    """Largest divisor of ``dim`` up to ``dim // 4``, i.e. at least 16x smaller than float32."""
+    for m in range(max(dim // 4, 1), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+class IVFCollection(FlatCollection):
+    """Flat collection with an in-memory IVF index over quantized residuals.
+
+    Raw vectors stay in the memory-mapped matrix and are only read to re-score the
+    best candidates. The trained model (coarse centroids and quantizer) is shared
+    through ``ivf_model.npz``; new rows are assigned and encoded incrementally by
+    every process the first time it searches after a write, without retraining.
+    Until a model is trained, searches are exact.
+    """
+
+    def __init__(self, path: str, dtype: np.dtype, db: "IVFVectorDB"):
+        super().__init__(path, dtype)
+        self.db = db
+        self._index_lock = threading.Lock()
+        self._model_stamp = None
+        self._model_id = None
+        self._synced = None
+        self._centroids: Optional[np.ndarray] = None
+        self._quantizer = None
+        self._reset_codes()
+
+    def _reset_codes(self):
+        self._generation = None
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._codes = None
+        self._order = np.empty(0, dtype=np.int64)
+        self._offsets = np.zeros(1, dtype=np.int64)
+
+    @property
+    def trained(self) -> bool:
+        return os.path.exists(os.path.join(self.path, MODEL_FILE))
+
+    def _current_model_stamp(self):
+        model_path = os.path.join(self.path, MODEL_FILE)
+        return os.stat(model_path).st_mtime_ns if os.path.exists(model_path) else None
+
+    def _load_model(self):
+        model_path = os.path.join(self.path, MODEL_FILE)
+        stamp = self._current_model_stamp()
+        if stamp == self._model_stamp:
+            return
+        self._model_stamp = stamp
+        self._reset_codes()
+        if stamp is None:
+            self._centroids = self._quantizer = self._model_id = None
+            return
+        with np.load(model_path) as model:
+            self._model_id = str(model["model_id"])
+            self._centroids = model["centroids"]
+            if str(model["kind"]) == ProductQuantizer.kind:
+                self._quantizer = ProductQuantizer(model["codebooks"].shape[0], model["codebooks"])
+            else:
+                self._quantizer = ScalarQuantizer(model["offset"], model["scale"])
+
+    def _load_codes(self, generation: int):
+        codes_path = os.path.join(self.path, CODES_FILE)
+        if not os.path.exists(codes_path):
+            return
+        with np.load(codes_path) as saved:
+            if str(saved["model_id"]) == self._model_id and int(saved["generation"]) == generation:
+                self._assignments = saved["assignments"]
+                self._codes = saved["codes"]
+
+    def _save_codes(self):
+        codes_path = os.path.join(self.path, CODES_FILE)
+        tmp_path = f"{codes_path}.{uuid.uuid4().hex}.tmp.npz"
+        np.savez(
+            tmp_path,
+            model_id=self._model_id,
+            generation=self._generation,
+            assignments=self._assignments,
+            codes=self._codes,
+        )
+        os.replace(tmp_path, codes_path)
+
+    def _encode(self, vectors: np.ndarray):
+        assignments = _nearest(vectors, self._centroids)
+        return assignments, self._quantizer.encode(vectors - self._centroids[assignments])
+
+    def _sync_index(self, matrix: np.ndarray):
+        """Load or extend the codes so they cover every row of ``matrix``."""
+        self._load_model()
+        if self._centroids is None:
+            return
+        generation = int(self._state("generation"))
+        if generation != self._generation or len(self._assignments) > len(matrix):
+            self._reset_codes()
+            self._generation = generation
+            self._load_codes(generation)
+
+        indexed = len(self._assignments)
+        if indexed < len(matrix):
+            new_assignments, new_codes = [self._assignments], [] if self._codes is None else [self._codes]
+            for start in range(indexed, len(matrix), SEARCH_BLOCK_ROWS):
+                assignments, codes = self._encode(matrix[start:start + SEARCH_BLOCK_ROWS].astype(np.float32))
+                new_assignments.append(assignments)
+                new_codes.append(codes)
+            self._assignments = np.concatenate(new_assignments)
+            self._codes = np.concatenate(new_codes)
+
+        # Inverted lists: rows grouped by centroid, list l is order[offsets[l]:offsets[l + 1]]
+        self._order = np.argsort(self._assignments, kind="stable")
+        counts = np.bincount(self._assignments, minlength=len(self._centroids))
+        self._offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def _indexed_snapshot(self):
+        with self._index_lock:
+            matrix, deleted = self._snapshot()
+            synced = (self._loaded_version, self._current_model_stamp())
+            if synced != self._synced:
+                self._sync_index(matrix)
+                self._synced = synced
+            return matrix, deleted, self._centroids, self._quantizer, self._assignments, self._codes, self._order, self._offsets
+
+    def search(self, query_vector: List[float], limit: int) -> List[FlatSearchHit]:
+        matrix, deleted, centroids, quantizer, assignments, codes, order, offsets = self._indexed_snapshot()
+        if centroids is None:
+            return super().search(query_vector, limit)
+        if len(matrix) == 0 or limit <= 0:
+            return []
+
+        query = self._normalize(np.asarray([query_vector], dtype=np.float32))[0]
+        # <q, x> = <q, centroid> + <q, residual>; probe the lists whose centroids are nearest to q
+        centroid_scores = centroids @ query
+        coarse = centroid_scores - 0.5 * np.einsum("ij,ij->i", centroids, centroids)
+        nprobe = min(self.db.nprobe, len(centroids))
+        probe = np.argpartition(-coarse, nprobe - 1)[:nprobe]
+        rows = np.concatenate([order[offsets[l]:offsets[l + 1]] for l in probe])
+        rows = rows[~deleted[rows]]
+        if len(rows) == 0:
+            return []
+
+        scores = centroid_scores[assignments[rows]] + quantizer.scores(query, codes[rows])
+        candidates = min(limit * self.db.rescore_factor if self.db.rescore else limit, len(rows))
+        top = np.argpartition(-scores, candidates - 1)[:candidates]
+        rows, scores = rows[top], scores[top]
+        if self.db.rescore:
+            # Exact scores from the memory-mapped vectors, in row order for sequential reads
+            by_row = np.argsort(rows)
+            rows, scores = rows[by_row], matrix[rows[by_row]].astype(np.float32) @ query
+
+        best = np.argsort(-scores)[:limit]
+        return self._hits(rows[best], scores[best])
+
+    def rebuild(self, nlist: Optional[int] = None):
+        """Train the coarse centroids and quantizer on the live rows and re-encode the collection."""
+        matrix, deleted = self._snapshot()
+        live = np.flatnonzero(~deleted)
+        if len(live) == 0:
+            logging.info(f"Nothing to index in {self.path}")
+            return
+
+        nlist = nlist or self.db.nlist or int(4 * np.sqrt(len(live)))
+        nlist = max(1, min(nlist, len(live)))
+        rng = np.random.default_rng(0)
+        sample_size = min(len(live), max(nlist * TRAIN_POINTS_PER_CENTROID, 256 * 40), MAX_TRAIN_ROWS)
+        sample = np.sort(rng.choice(live, sample_size, replace=False))
+        data = matrix[sample].astype(np.float32)
+
+        centroids = kmeans(data, nlist)
+        residuals = data - centroids[_nearest(data, centroids)]
+        if self.db.quantizer == ProductQuantizer.kind:
+            quantizer = ProductQuantizer(self.db.pq_m or default_pq_m(data.shape[1]))
+        else:
+            quantizer = ScalarQuantizer()
+        quantizer.train(residuals)
+
+        model_path = os.path.join(self.path, MODEL_FILE)
+        tmp_path = f"{model_path}.{uuid.uuid4().hex}.tmp.npz"
+        np.savez(tmp_path, model_id=uuid.uuid4().hex, kind=quantizer.kind, centroids=centroids, **quantizer.state())
+        os.replace(tmp_path, model_path)
+
+        with self._index_lock:
+            self._sync_index(self._snapshot()[0])
+            self._synced = None
+            self._save_codes()
+        logging.info(
+            f"Built IVF index for {self.path}: {len(centroids)} lists, {quantizer.kind} codes "
+            f"of {self._codes.shape[1]} bytes per vector, trained on {len(sample)} rows"
+        )
+
+    def compact(self):
+        super().compact()
+        if self.trained:
+            # Rows were renumbered: re-encode with the existing model and share the codes
+            with self._index_lock:
+                self._sync_index(self._snapshot()[0])
+                self._synced = None
+                self._save_codes()
+
+
+class IVFVectorDB(FlatVectorDB):
+    """Approximate search backend: inverted-file index with int8 or PQ-compressed residuals.
+
+    Shares the on-disk layout of ``FlatVectorDB``. A collection is trained automatically
+    once it holds ``min_train_rows`` vectors; ``rebuild`` retrains it after large
+    changes. Searches probe the ``nprobe`` nearest lists and, with ``rescore``, re-rank
+    ``rescore_factor * limit`` candidates by exact similarity.
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        dtype: str = "float32",
+        compact_ratio: float = DEFAULT_COMPACT_RATIO,
+        nlist: int = 0,
+        nprobe: int = 16,
+        quantizer: str = ScalarQuantizer.kind,
+        pq_m: int = 0,
+        rescore: bool = True,
+        rescore_factor: int = 4,
+        min_train_rows: int = 10000,
+    ):
+        if quantizer not in (ScalarQuantizer.kind, ProductQuantizer.kind):
+            raise ValueError(f"Unknown quantizer {quantizer}, expected int8 or pq")
+        super().__init__(root_dir, dtype=dtype, compact_ratio=compact_ratio)
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.quantizer = quantizer
+        self.pq_m = pq_m
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor
+        self.min_train_rows = min_train_rows
+
+    def _open_collection(self, path: str) -> IVFCollection:
+        return IVFCollection(path, self.dtype, self)
+
+    def add_vectors(self, collection_name: str, vector_ids: List[str], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
+        super().add_vectors(collection_name, vector_ids, vectors, payloads)
+        collection = self._collection(collection_name)
+        if vectors and not collection.trained and len(collection._snapshot()[0]) >= self.min_train_rows:
+            collection.rebuild()
+
+    def rebuild(self, collection_name: str, nlist: Optional[int] = None):
+        collection = self._collection(collection_name, create=False)
+        if collection is None:
+            raise ValueError(f"Collection {collection_name} has not been initialized.")
+        if collection._snapshot()[1].any():
+            collection.compact()
+        collection.rebuild(nlist)
@@ -1,5 +1,5 @@
 from fastapi import HTTPException
-from sqlalchemy import create_engine, or_
+from sqlalchemy import create_engine, delete, func, insert, inspect, or_, text, update
 from sqlalchemy.orm import sessionmaker
 from .models import (
     Base,
@@ -7,6 +7,7 @@ from .models import (
     KnowledgeBase,
     Document,
     DocumentChunk,
+    TranscriptSegment,
     Assistant,
     Conversation,
     Message,
@@ -16,7 +17,9 @@ from .models import (
 from api.models.knowledge_base import KnowledgeBaseResponse
 from .vector_store import VectorDB, QdrantVectorDB
 from datetime import datetime
+import os
 import uuid
+from collections import defaultdict
 import random
 
 
@@ -33,9 +36,25 @@ class DatabaseManager:
             f"sqlite:///{db_path}", connect_args={"check_same_thread": False}
         )
         Base.metadata.create_all(self.engine)
+        self._add_missing_columns()
         self.Session = sessionmaker(bind=self.engine)
         self.vector_db = vector_db
 
+    def _add_missing_columns(self):
+        # create_all does not alter existing tables, so add columns introduced since
+        inspector = inspect(self.engine)
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name not in existing:
+                        column_type = column.type.compile(dialect=self.engine.dialect)
+                        connection.execute(
+                            text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+                        )
+                for index in table.indexes:
+                    index.create(bind=connection, checkfirst=True)
+
     ## User methods
     def create_user(self, username, email, password_hash):
         with self.Session() as session:
@@ -103,6 +122,8 @@ class DatabaseManager:
         file_type,
         file_path,
         status=DocumentStatus.UPLOADED,
+        file_size=None,
+        content_hash=None,
     ):
         with self.Session() as session:
             doc = Document(
@@ -111,6 +132,8 @@ class DatabaseManager:
                 file_type=file_type,
                 file_path=file_path,
                 status=status,
+                file_size=file_size,
+                content_hash=content_hash,
             )
             session.add(doc)
             session.commit()
@@ -148,6 +171,282 @@ class DatabaseManager:
             )
             return chunk.id
 
+    def add_document_chunks(self, document_id, chunks):
+        """Persist many chunks of a document at once.
+
+        ``chunks`` is a list of dicts with ``chunk_index``, ``content``, ``vector``
+        and optional ``metadata``, ``vector_id`` and ``minhash`` keys. A near-duplicate
+        chunk has ``duplicate_of`` (the canonical chunk's vector id) instead of a
+        ``vector``: it is stored as a row sharing that vector and no vector is added.
+        All ``DocumentChunk`` rows are written in a single transaction and the vectors
+        are pushed to the store in batches.
+        """
+        if not chunks:
+            return []
+
+        with self.Session() as session:
+            document = session.query(Document).filter_by(id=document_id).first()
+            if not document:
+                raise ValueError("Document not found")
+
+            knowledge_base_id = document.knowledge_base_id
+
+            rows = [
+                DocumentChunk(
+                    document_id=document_id,
+                    chunk_index=chunk["chunk_index"],
+                    content=chunk["content"],
+                    vector_id=chunk.get("duplicate_of") or chunk.get("vector_id") or str(uuid.uuid4()),
+                    minhash=chunk.get("minhash"),
+                    chunk_metadata=chunk.get("metadata") if "duplicate_of" in chunk else None,
+                )
+                for chunk in chunks
+            ]
+            session.add_all(rows)
+            session.flush()
+
+            # Point near-duplicates at the canonical row, from this batch or stored earlier
+            canonical_ids = {
+                row.vector_id: row.id
+                for row, chunk in zip(rows, chunks)
+                if "duplicate_of" not in chunk
+            }
+            missing = {chunk["duplicate_of"] for chunk in chunks if "duplicate_of" in chunk} - canonical_ids.keys()
+            if missing:
+                canonical_ids.update(
+                    session.query(DocumentChunk.vector_id, DocumentChunk.id)
+                    .filter(
+                        DocumentChunk.vector_id.in_(missing),
+                        DocumentChunk.duplicate_of.is_(None),
+                        DocumentChunk.id.notin_([row.id for row in rows]),
+                    )
+                    .all()
+                )
+            for row, chunk in zip(rows, chunks):
+                if "duplicate_of" in chunk:
+                    row.duplicate_of = canonical_ids.get(chunk["duplicate_of"])
+
+            chunk_ids = [row.id for row in rows]
+            new_vectors = [
+                (row.id, row.vector_id, chunk)
+                for row, chunk in zip(rows, chunks)
+                if "duplicate_of" not in chunk
+            ]
+            session.commit()
+
+        if new_vectors:
+            self.vector_db.add_vectors(
+                collection_name=f"kb_{knowledge_base_id}",
+                vector_ids=[vector_id for _, vector_id, _ in new_vectors],
+                vectors=[chunk["vector"] for _, _, chunk in new_vectors],
+                payloads=[
+                    {
+                        "document_chunk_id": chunk_id,
+                        "text": chunk["content"],
+                        "metadata": chunk.get("metadata"),
+                    }
+                    for chunk_id, _, chunk in new_vectors
+                ],
+            )
+        return chunk_ids
+
+    def get_chunk_signatures(self, document_id: int = None, knowledge_base_id: int = None):
+        """``(vector_id, minhash)`` of canonical chunks of a document or a whole knowledge base."""
+        with self.Session() as session:
+            query = session.query(DocumentChunk.vector_id, DocumentChunk.minhash).filter(
+                DocumentChunk.duplicate_of.is_(None),
+                DocumentChunk.minhash.isnot(None),
+            )
+            if knowledge_base_id is not None:
+                query = query.join(Document).filter(Document.knowledge_base_id == knowledge_base_id)
+            else:
+                query = query.filter(DocumentChunk.document_id == document_id)
+            return query.all()
+
+    def _release_chunks(self, session, chunks):
+        """Detach ``chunks``, about to be deleted, from the near-duplicates sharing their vectors.
+
+        Surviving duplicates of a deleted canonical chunk are re-pointed to the first of
+        them, which becomes canonical and keeps the vector. Returns the vector ids no
+        other chunk references, which are safe to delete from the vector store, and the
+        new payloads of kept vectors, which must stop citing the deleted chunks.
+        """
+        deleted_ids = [chunk.id for chunk in chunks]
+        canonical_ids = [chunk.id for chunk in chunks if chunk.duplicate_of is None]
+        survivors = defaultdict(list)
+        if canonical_ids:
+            for row in (
+                session.query(DocumentChunk)
+                .filter(DocumentChunk.duplicate_of.in_(canonical_ids), DocumentChunk.id.notin_(deleted_ids))
+                .order_by(DocumentChunk.id)
+            ):
+                survivors[row.duplicate_of].append(row)
+        payloads = {}
+        for rows in survivors.values():
+            rows[0].duplicate_of = None
+            for row in rows[1:]:
+                row.duplicate_of = rows[0].id
+            payloads[rows[0].vector_id] = self._chunk_payload(rows[0])
+            rows[0].chunk_metadata = None
+
+        vector_ids = {chunk.vector_id for chunk in chunks}
+        still_used = {
+            vector_id
+            for (vector_id,) in session.query(DocumentChunk.vector_id)
+            .filter(DocumentChunk.vector_id.in_(vector_ids), DocumentChunk.id.notin_(deleted_ids))
+            .distinct()
+        }
+        return list(vector_ids - still_used), payloads
+
+    def _chunk_payload(self, chunk: DocumentChunk):
+        """Vector payload of a stored chunk, as written when its vector was added."""
+        metadata = chunk.chunk_metadata
+        if metadata is None:
+            # Duplicates stored before their metadata was kept, cite at least their document
+            metadata = {"file_name": chunk.document.file_name, "file_path": chunk.document.file_path}
+        return {"document_chunk_id": chunk.id, "text": chunk.content, "metadata": metadata}
+
+    def count_document_chunks(self, document_id: int) -> int:
+        with self.Session() as session:
+            return session.query(DocumentChunk).filter_by(document_id=document_id).count()
+
+    def get_document_chunks(self, document_id: int):
+        with self.Session() as session:
+            return (
+                session.query(DocumentChunk)
+                .filter_by(document_id=document_id)
+                .order_by(DocumentChunk.chunk_index)
+                .all()
+            )
+
+    def update_chunk_indexes(self, chunk_indexes):
+        """Set ``chunk_index`` for existing chunks from a ``{chunk_id: chunk_index}`` map."""
+        if not chunk_indexes:
+            return
+        with self.Session() as session:
+            session.execute(
+                update(DocumentChunk),
+                [
+                    {"id": chunk_id, "chunk_index": chunk_index}
+                    for chunk_id, chunk_index in chunk_indexes.items()
+                ],
+            )
+            session.commit()
+
+    def renumber_document_chunks(self, document_id: int) -> int:
+        """Renumber a document's chunks to 0..n-1, keeping their current relative order."""
+        with self.Session() as session:
+            rows = (
+                session.query(DocumentChunk.id, DocumentChunk.chunk_index)
+                .filter_by(document_id=document_id)
+                .order_by(DocumentChunk.chunk_index, DocumentChunk.id)
+                .all()
+            )
+            changes = [
+                {"id": chunk_id, "chunk_index": i}
+                for i, (chunk_id, chunk_index) in enumerate(rows)
+                if chunk_index != i
+            ]
+            if changes:
+                session.execute(update(DocumentChunk), changes)
+                session.commit()
+            return len(rows)
+
+    def delete_document_chunks(self, document_id: int, chunk_ids):
+        """Delete chunks of a document from both SQL and the vector store."""
+        if not chunk_ids:
+            return
+        with self.Session() as session:
+            document = session.query(Document).filter_by(id=document_id).first()
+            if not document:
+                raise ValueError("Document not found")
+            knowledge_base_id = document.knowledge_base_id
+
+            chunks = (
+                session.query(DocumentChunk)
+                .filter(DocumentChunk.document_id == document_id, DocumentChunk.id.in_(chunk_ids))
+                .all()
+            )
+            # Vectors still shared with near-duplicates elsewhere are kept
+            vector_ids, payloads = self._release_chunks(session, chunks)
+            for chunk in chunks:
+                session.delete(chunk)
+            session.commit()
+
+        self.vector_db.update_payloads(
+            collection_name=f"kb_{knowledge_base_id}",
+            vector_ids=list(payloads),
+            payloads=list(payloads.values()),
+        )
+        self.vector_db.delete_vectors(
+            collection_name=f"kb_{knowledge_base_id}",
+            vector_ids=vector_ids,
+        )
+
+    def delete_document_chunk_range(self, document_id: int, start_index: int, end_index: int) -> int:
+        """Delete the chunks of a document with ``start_index <= chunk_index < end_index``."""
+        with self.Session() as session:
+            chunk_ids = [
+                chunk_id
+                for (chunk_id,) in session.query(DocumentChunk.id).filter(
+                    DocumentChunk.document_id == document_id,
+                    DocumentChunk.chunk_index >= start_index,
+                    DocumentChunk.chunk_index < end_index,
+                )
+            ]
+        self.delete_document_chunks(document_id, chunk_ids)
+        return len(chunk_ids)
+
+    def replace_transcript_segments(self, document_id: int, segments) -> int:
+        """Store a document's transcript, replacing any previous one.
+
+        ``segments`` are dicts with ``start`` and ``end`` in seconds, ``text`` and
+        optionally ``words``.
+        """
+        with self.Session() as session:
+            session.execute(delete(TranscriptSegment).filter_by(document_id=document_id))
+            if segments:
+                session.execute(
+                    insert(TranscriptSegment),
+                    [
+                        {
+                            "document_id": document_id,
+                            "start_time": segment["start"],
+                            "end_time": segment["end"],
+                            "text": segment["text"],
+                            "words": segment.get("words"),
+                        }
+                        for segment in segments
+                    ],
+                )
+            session.commit()
+        return len(segments)
+
+    def get_transcript_segments(self, document_id: int, start_time: float = None, end_time: float = None):
+        """Transcript segments overlapping ``[start_time, end_time)``, ordered by start.
+
+        Segments do not overlap, so the range starts at the last segment starting at or
+        before ``start_time``; both bounds are index seeks on (document_id, start_time).
+        """
+        with self.Session() as session:
+            query = session.query(TranscriptSegment).filter(TranscriptSegment.document_id == document_id)
+            if start_time is not None:
+                floor = (
+                    session.query(func.max(TranscriptSegment.start_time))
+                    .filter(
+                        TranscriptSegment.document_id == document_id,
+                        TranscriptSegment.start_time <= start_time,
+                    )
+                    .scalar_subquery()
+                )
+                query = query.filter(
+                    TranscriptSegment.start_time >= func.coalesce(floor, start_time),
+                    TranscriptSegment.end_time > start_time,
+                )
+            if end_time is not None:
+                query = query.filter(TranscriptSegment.start_time < end_time)
+            return query.order_by(TranscriptSegment.start_time).all()
+
     def update_document_status(self, document_id: int, status: DocumentStatus):
         with self.Session() as session:
             document = session.query(Document).filter_by(id=document_id).first()
@@ -171,17 +470,69 @@ class DatabaseManager:
             )
             return document
 
+    def get_document_by_path(self, knowledge_base_id: int, file_path: str):
+        """Document stored at ``file_path``, or whose stored file has the same base name.
+
+        Chunk metadata carries the stored path (``uploads/<uuid>_<name>``), which differs
+        from the ``file_name`` the document was uploaded with.
+        """
+        with self.Session() as session:
+            document = (
+                session.query(Document)
+                .filter(
+                    Document.knowledge_base_id == knowledge_base_id,
+                    or_(
+                        Document.file_path == file_path,
+                        Document.file_path == os.path.basename(file_path),
+                        Document.file_path.endswith(os.sep + os.path.basename(file_path), autoescape=True),
+                    ),
+                )
+                .first()
+            )
+            return document
+
+    def get_document_by_hash(self, knowledge_base_id: int, content_hash: str):
+        with self.Session() as session:
+            document = (
+                session.query(Document)
+                .filter_by(knowledge_base_id=knowledge_base_id, content_hash=content_hash)
+                .first()
+            )
+            return document
+
+    def update_document_file(self, document_id: int, file_size: int, content_hash: str):
+        with self.Session() as session:
+            document = session.query(Document).filter_by(id=document_id).first()
+            if not document:
+                raise ValueError("Document not found")
+            document.file_size = file_size
+            document.content_hash = content_hash
+            session.commit()
+
     def delete_document(self, document_id: int):
         with self.Session() as session:
             document = session.query(Document).filter_by(id=document_id).first()
             if not document:
                 return False
-            # Delete the document chunks
+            knowledge_base_id = document.knowledge_base_id
+            # Delete the document chunks, handing shared vectors over to duplicates in other documents
+            vector_ids, payloads = self._release_chunks(session, session.query(DocumentChunk).filter_by(document_id=document_id).all())
             session.query(DocumentChunk).filter_by(document_id=document_id).delete()
+            session.query(TranscriptSegment).filter_by(document_id=document_id).delete()
             # Delete the document
             session.delete(document)
             session.commit()
-            return True
+
+        self.vector_db.update_payloads(
+            collection_name=f"kb_{knowledge_base_id}",
+            vector_ids=list(payloads),
+            payloads=list(payloads.values()),
+        )
+        self.vector_db.delete_vectors(
+            collection_name=f"kb_{knowledge_base_id}",
+            vector_ids=vector_ids,
+        )
+        return True
 
     def search_similar_chunks(self, query_vector, knowledge_base_id, limit=5):
         search_result = self.vector_db.search_vectors(
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, JSON, Enum
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Text, JSON, Enum, Index, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -72,6 +72,8 @@ class Document(Base):
     file_name = Column(String(255), nullable=False)
     file_type = Column(String(50), nullable=False)
     file_path = Column(String(255), nullable=False)
+    file_size = Column(Integer)
+    content_hash = Column(String(64), index=True)  # sha256 of the file content
     status = Column(Enum(DocumentStatus), default=DocumentStatus.UPLOADED)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -86,11 +88,30 @@ class DocumentChunk(Base):
     document_id = Column(Integer, ForeignKey("documents.id"))
     chunk_index = Column(Integer, nullable=False)
     content = Column(Text, nullable=False)
-    vector_id = Column(String(36), nullable=False)  # UUID as string
+    vector_id = Column(String(36), nullable=False, index=True)  # UUID as string, shared by near-duplicates
+    # Canonical chunk whose vector this near-duplicate reuses, None for canonical chunks
+    duplicate_of = Column(Integer, ForeignKey("document_chunks.id"), index=True)
+    minhash = Column(LargeBinary)  # MinHash signature used for near-duplicate detection
+    # Source metadata of a near-duplicate, for the shared vector's payload if it becomes canonical
+    chunk_metadata = Column(JSON)
     created_at = Column(DateTime, default=datetime.utcnow)
     document = relationship("Document", back_populates="chunks")
 
 
+class TranscriptSegment(Base):
+    __tablename__ = "transcript_segments"
+    __table_args__ = (
+        # Time-range lookups seek on (document_id, start_time)
+        Index("ix_transcript_segments_document_start", "document_id", "start_time"),
+    )
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
+    start_time = Column(Float, nullable=False)  # seconds
+    end_time = Column(Float, nullable=False)  # seconds
+    text = Column(Text, nullable=False)
+    words = Column(JSON)  # [{"word", "start", "end"}], seconds
+
+
 class Assistant(Base):
     __tablename__ = "assistants"
     id = Column(Integer, primary_key=True)
@@ -0,0 +1,129 @@
+import json
+import hashlib
+from typing import Any, Dict, Optional
+from qdrant_client.http import models
+
+QUANTIZATION_TYPES = ("scalar", "binary")
+
+
+class QdrantProfile:
+    """Storage, index and search settings applied to a Qdrant collection.
+
+    Built from a ``QDRANT.PROFILES`` entry of ``config.yaml``; keys that are left out
+    keep Qdrant's defaults:
+
+    - ``on_disk`` / ``on_disk_payload``: keep vectors / payloads memory-mapped instead of in RAM
+    - ``hnsw``: ``m``, ``ef_construct``, ``on_disk``, ``full_scan_threshold``
+    - ``indexing_threshold`` / ``memmap_threshold``: segment sizes (KB) to build HNSW / switch to mmap
+    - ``quantization``: ``type`` (scalar or binary), ``always_ram``, ``quantile`` (scalar),
+      ``rescore`` and ``oversampling`` (search time)
+    - ``search_ef``: HNSW ``ef`` used by searches
+    """
+
+    def __init__(self, name: str, settings: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.settings = dict(settings or {})
+        quantization = self.settings.get("quantization") or {}
+        if quantization and quantization.get("type", "scalar") not in QUANTIZATION_TYPES:
+            raise ValueError(f"Profile {name}: quantization type must be one of {QUANTIZATION_TYPES}")
+        self.quantization = dict(quantization)
+        self.hnsw = dict(self.settings.get("hnsw") or {})
+
+    @property
+    def fingerprint(self) -> str:
+        """Changes whenever the collection-level settings change, so collections get migrated."""
+        collection_settings = {key: value for key, value in self.settings.items() if key != "search_ef"}
+        digest = hashlib.sha256(json.dumps(collection_settings, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{self.name}:{digest[:16]}"
+
+    def _hnsw_config(self) -> Optional[models.HnswConfigDiff]:
+        if not self.hnsw:
+            return None
+        return models.HnswConfigDiff(
+            m=self.hnsw.get("m"),
+            ef_construct=self.hnsw.get("ef_construct"),
+            full_scan_threshold=self.hnsw.get("full_scan_threshold"),
+            on_disk=self.hnsw.get("on_disk"),
+        )
+
+    def _optimizers_config(self) -> Optional[models.OptimizersConfigDiff]:
+        if "indexing_threshold" not in self.settings and "memmap_threshold" not in self.settings:
+            return None
+        return models.OptimizersConfigDiff(
+            indexing_threshold=self.settings.get("indexing_threshold"),
+            memmap_threshold=self.settings.get("memmap_threshold"),
+        )
+
+    def _quantization_config(self):
+        if not self.quantization:
+            return None
+        always_ram = self.quantization.get("always_ram", True)
+        if self.quantization.get("type", "scalar") == "binary":
+            return models.BinaryQuantization(binary=models.BinaryQuantizationConfig(always_ram=always_ram))
+        return models.ScalarQuantization(
+            scalar=models.ScalarQuantizationConfig(
+                type=models.ScalarType.INT8,
+                quantile=self.quantization.get("quantile"),
+                always_ram=always_ram,
+            )
+        )
+
+    def create_params(self, vector_size: int, distance) -> Dict[str, Any]:
+        """Keyword arguments for ``QdrantClient.create_collection``."""
+        params = {
+            "vectors_config": models.VectorParams(size=vector_size, distance=distance, on_disk=self.settings.get("on_disk")),
+            "on_disk_payload": self.settings.get("on_disk_payload"),
+            "hnsw_config": self._hnsw_config(),
+            "optimizers_config": self._optimizers_config(),
+            "quantization_config": self._quantization_config(),
+        }
+        return {key: value for key, value in params.items() if value is not None}
+
+    def update_params(self) -> Dict[str, Any]:
+        """Keyword arguments for ``QdrantClient.update_collection`` bringing a collection in line with this profile.
+
+        Quantization is switched off explicitly when the profile has none, settings the
+        profile leaves out are not touched.
+        """
+        params = {
+            "hnsw_config": self._hnsw_config(),
+            "optimizers_config": self._optimizers_config(),
+            "quantization_config": self._quantization_config() or models.Disabled.DISABLED,
+        }
+        if "on_disk" in self.settings:
+            params["vectors_config"] = {"": models.VectorParamsDiff(on_disk=self.settings["on_disk"])}
+        if "on_disk_payload" in self.settings:
+            params["collection_params"] = models.CollectionParamsDiff(on_disk_payload=self.settings["on_disk_payload"])
+        return {key: value for key, value in params.items() if value is not None}
+
+    def search_params(self) -> Optional[models.SearchParams]:
+        quantization = None
+        if self.quantization:
+            quantization = models.QuantizationSearchParams(
+                rescore=self.quantization.get("rescore", True),
+                oversampling=self.quantization.get("oversampling"),
+            )
+        if quantization is None and self.settings.get("search_ef") is None:
+            return None
+        return models.SearchParams(hnsw_ef=self.settings.get("search_ef"), quantization=quantization)
+
+
+class QdrantProfiles:
+    """Profiles by name plus the collection -> profile assignment from ``config.yaml``."""
+
+    def __init__(
+        self,
+        profiles: Optional[Dict[str, Dict[str, Any]]] = None,
+        default_profile: str = "default",
+        collections: Optional[Dict[str, str]] = None,
+    ):
+        self.profiles = {name: QdrantProfile(name, settings) for name, settings in (profiles or {}).items()}
+        self.profiles.setdefault(default_profile, QdrantProfile(default_profile))
+        self.default_profile = default_profile
+        self.collections = dict(collections or {})
+        for collection_name, profile_name in self.collections.items():
+            if profile_name not in self.profiles:
+                raise ValueError(f"Collection {collection_name} uses unknown Qdrant profile {profile_name}")
+
+    def for_collection(self, collection_name: str) -> QdrantProfile:
+        return self.profiles[self.collections.get(collection_name, self.default_profile)]
@@ -1,87 +1,289 @@
+import logging
+import threading
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
+from qdrant_client.http.exceptions import UnexpectedResponse
 from chromadb import Client as ChromaClient
 from typing import Optional, List, Dict, Any
+from src.database.collection_registry import CollectionRegistry
+from src.database.qdrant_profiles import QdrantProfiles
 
 DEFAULT_DISTANCE = models.Distance.COSINE
+DEFAULT_BATCH_SIZE = 512
+DEFAULT_UPSERT_PARALLELISM = 4
+# Payload indexes every knowledge base collection gets
+PAYLOAD_INDEXES = {"document_chunk_id": models.PayloadSchemaType.INTEGER}
 
 class VectorDB(ABC):
     @abstractmethod
-    def create_collection(self, collection_name: str):
+    def create_collection(self, collection_name: str, vector_size: Optional[int] = None):
         pass
 
     @abstractmethod
     def add_vector(self, collection_name: str, vector_id: str, vector: List[float], payload: Dict[str, Any]):
         pass
 
+    @abstractmethod
+    def add_vectors(self, collection_name: str, vector_ids: List[str], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
+        pass
+
+    @abstractmethod
+    def delete_vectors(self, collection_name: str, vector_ids: List[str]):
+        pass
+
+    @abstractmethod
+    def update_payloads(self, collection_name: str, vector_ids: List[str], payloads: List[Dict[str, Any]]):
+        """Replace the payloads of existing vectors, keeping the vectors."""
+        pass
+
     @abstractmethod
     def search_vectors(self, collection_name: str, query_vector: List[float], limit: int):
         pass
 
 class QdrantVectorDB(VectorDB):
-    def __init__(self, url: str, distance: str = DEFAULT_DISTANCE):
+    def __init__(
+        self,
+        url: str,
+        distance: str = DEFAULT_DISTANCE,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        upsert_parallelism: int = DEFAULT_UPSERT_PARALLELISM,
+        registry: Optional[CollectionRegistry] = None,
+        profiles: Optional[QdrantProfiles] = None,
+    ):
         self.client = QdrantClient(url)
+        self.url = url
         self.distance = distance
-        self.initialized_collections = set()
-        self.pending_collections = set()
+        self.batch_size = batch_size
+        self.upsert_parallelism = upsert_parallelism
+        self._upsert_executor: Optional[ThreadPoolExecutor] = None
+        self.registry = registry
+        self.profiles = profiles or QdrantProfiles()
+        # Schemas of collections known to exist, by name
+        self._schemas: Dict[str, Dict[str, Any]] = {}
+        self._collection_lock = threading.Lock()
 
-    def create_collection(self, collection_name: str):
-        if collection_name not in self.pending_collections:
-            self.pending_collections.add(collection_name)
+    def create_collection(self, collection_name: str, vector_size: Optional[int] = None):
+        # The vector size is usually only known at the first write, creation waits until then
+        if vector_size is not None:
+            self._ensure_collection(collection_name, vector_size)
 
-    def _initialize_collection(self, collection_name: str, vector_size: int):
-        self.client.recreate_collection(
-            collection_name=collection_name,
-            vectors_config=models.VectorParams(size=vector_size, distance=self.distance),
-        )
-        self.client.create_payload_index(
+    def _fetch_schema(self, collection_name: str) -> Optional[Dict[str, Any]]:
+        if not self.client.collection_exists(collection_name):
+            return None
+        info = self.client.get_collection(collection_name)
+        vectors = info.config.params.vectors
+        return {
+            "vector_size": vectors.size,
+            "distance": getattr(vectors.distance, "value", vectors.distance),
+            "payload_indexes": sorted(info.payload_schema or {}),
+        }
+
+    def _get_schema(self, collection_name: str) -> Optional[Dict[str, Any]]:
+        """Schema of an existing collection: process cache, then the shared registry, then the server."""
+        schema = self._schemas.get(collection_name)
+        if schema is None and self.registry is not None:
+            schema = self.registry.get(self.url, collection_name)
+        if schema is None:
+            schema = self._fetch_schema(collection_name)
+            if schema is not None and self.registry is not None:
+                self.registry.put(self.url, collection_name, schema)
+        if schema is not None:
+            self._schemas[collection_name] = schema
+        return schema
+
+    def _forget_collection(self, collection_name: str):
+        self._schemas.pop(collection_name, None)
+        if self.registry is not None:
+            self.registry.delete(self.url, collection_name)
+
+    def _apply_profile(self, collection_name: str, schema: Dict[str, Any]) -> Dict[str, Any]:
+        """Migrate an existing collection to its configured profile if the profile changed."""
+        profile = self.profiles.for_collection(collection_name)
+        if schema.get("profile") == profile.fingerprint:
+            return schema
+        # Qdrant rebuilds indexes and quantized vectors in the background, points stay searchable
+        self.client.update_collection(collection_name=collection_name, **profile.update_params())
+        logging.info(f"Applied Qdrant profile {profile.name} to {collection_name}")
+        return {**schema, "profile": profile.fingerprint}
+
+    def _ensure_collection(self, collection_name: str, vector_size: int) -> Dict[str, Any]:
+        """Create the collection and its payload indexes if missing; never drops existing points."""
+        with self._collection_lock:
+            schema = self._get_schema(collection_name)
+            known = schema
+            if schema is None:
+                profile = self.profiles.for_collection(collection_name)
+                try:
+                    self.client.create_collection(
+                        collection_name=collection_name,
+                        **profile.create_params(vector_size, self.distance),
+                    )
+                    created = True
+                except UnexpectedResponse:
+                    # Another process created it first
+                    if not self.client.collection_exists(collection_name):
+                        raise
+                    created = False
+                schema = self._fetch_schema(collection_name)
+                if created:
+                    schema["profile"] = profile.fingerprint
+
+            missing_indexes = [field for field in PAYLOAD_INDEXES if field not in schema["payload_indexes"]]
+            for field in missing_indexes:
+                self.client.create_payload_index(
+                    collection_name=collection_name,
+                    field_name=field,
+                    field_schema=PAYLOAD_INDEXES[field],
+                )
+            if missing_indexes:
+                schema = {**schema, "payload_indexes": sorted({*schema["payload_indexes"], *missing_indexes})}
+
+            if schema["vector_size"] != vector_size:
+                raise ValueError(
+                    f"Collection {collection_name} stores {schema['vector_size']}-d vectors, got {vector_size}-d"
+                )
+            schema = self._apply_profile(collection_name, schema)
+
+            if schema is not known:
+                self._schemas[collection_name] = schema
+                if self.registry is not None:
+                    self.registry.put(self.url, collection_name, schema)
+            return schema
+
+    def migrate_collections(self, collection_names: Optional[List[str]] = None) -> List[str]:
+        """Apply the configured profiles to existing collections (all on the server by default).
+
+        Returns the names of the collections that were updated.
+        """
+        if collection_names is None:
+            collection_names = [collection.name for collection in self.client.get_collections().collections]
+        migrated = []
+        for collection_name in collection_names:
+            with self._collection_lock:
+                schema = self._get_schema(collection_name)
+                if schema is None:
+                    continue
+                updated = self._apply_profile(collection_name, schema)
+                if updated is not schema:
+                    self._schemas[collection_name] = updated
+                    if self.registry is not None:
+                        self.registry.put(self.url, collection_name, updated)
+                    migrated.append(collection_name)
+        return migrated
+
+    def add_vector(self, collection_name: str, vector_id: str, vector: List[float], payload: Dict[str, Any]):
+        self.add_vectors(collection_name, [vector_id], [vector], [payload])
+
+    def add_vectors(self, collection_name: str, vector_ids: List[str], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
+        """Upsert points in batches of ``batch_size``, keeping several batches in flight.
+
+        All but the last batch are sent with ``wait=False`` on up to ``upsert_parallelism``
+        threads. Once they are all acknowledged the last batch is sent with ``wait=True``:
+        Qdrant applies updates in order, so when it returns every point is searchable.
+        """
+        if not vectors:
+            return
+
+        self._ensure_collection(collection_name, len(vectors[0]))
+
+        batches = [
+            models.Batch(
+                ids=vector_ids[start:start + self.batch_size],
+                vectors=vectors[start:start + self.batch_size],
+                payloads=payloads[start:start + self.batch_size],
+            )
+            for start in range(0, len(vectors), self.batch_size)
+        ]
+        try:
+            self._upsert_batches(collection_name, batches)
+        except UnexpectedResponse as e:
+            if e.status_code != 404:
+                raise
+            # The collection was dropped behind the registry's back; upserts are idempotent, retry once
+            self._forget_collection(collection_name)
+            self._ensure_collection(collection_name, len(vectors[0]))
+            self._upsert_batches(collection_name, batches)
+
+    def _upsert_batches(self, collection_name: str, batches: List[models.Batch]):
+        *pipelined, barrier = batches
+
+        if pipelined:
+            if self._upsert_executor is None:
+                self._upsert_executor = ThreadPoolExecutor(
+                    max_workers=self.upsert_parallelism, thread_name_prefix="qdrant-upsert"
+                )
+            futures = [
+                self._upsert_executor.submit(
+                    self.client.upsert, collection_name=collection_name, points=batch, wait=False
+                )
+                for batch in pipelined
+            ]
+            for future in futures:
+                future.result()
+            logging.debug(f"Upserted {len(pipelined)} batches into {collection_name} without waiting")
+
+        self.client.upsert(collection_name=collection_name, points=barrier, wait=True)
+
+    def delete_vectors(self, collection_name: str, vector_ids: List[str]):
+        if not vector_ids:
+            return
+        self.client.delete(
             collection_name=collection_name,
-            field_name="document_chunk_id",
-            field_schema=models.PayloadSchemaType.INTEGER
+            points_selector=models.PointIdsList(points=vector_ids),
         )
-        self.initialized_collections.add(collection_name)
-        self.pending_collections.remove(collection_name)
 
-    def add_vector(self, collection_name: str, vector_id: str, vector: List[float], payload: Dict[str, Any]):
-        if collection_name not in self.initialized_collections:
-            if collection_name not in self.pending_collections:
-                self.create_collection(collection_name)
-            
-            if collection_name in self.pending_collections:
-                self._initialize_collection(collection_name, len(vector))
-
-        self.client.upsert(
+    def update_payloads(self, collection_name: str, vector_ids: List[str], payloads: List[Dict[str, Any]]):
+        if not vector_ids:
+            return
+        self.client.batch_update_points(
             collection_name=collection_name,
-            points=[
-                models.PointStruct(
-                    id=vector_id,
-                    vector=vector,
-                    payload=payload
+            update_operations=[
+                models.OverwritePayloadOperation(
+                    overwrite_payload=models.SetPayload(payload=payload, points=[vector_id])
                 )
-            ]
+                for vector_id, payload in zip(vector_ids, payloads)
+            ],
         )
 
     def search_vectors(self, collection_name: str, query_vector: List[float], limit: int):
-        if collection_name not in self.initialized_collections:
+        if self._get_schema(collection_name) is None:
             raise ValueError(f"Collection {collection_name} has not been initialized.")
         
-        search_result = self.client.search(
-            collection_name=collection_name,
-            query_vector=query_vector,
-            limit=limit
-        )
+        try:
+            search_result = self.client.search(
+                collection_name=collection_name,
+                query_vector=query_vector,
+                limit=limit,
+                search_params=self.profiles.for_collection(collection_name).search_params(),
+            )
+        except UnexpectedResponse as e:
+            if e.status_code != 404:
+                raise
+            # The collection was dropped behind the registry's back, it has nothing to find
+            self._forget_collection(collection_name)
+            return []
         return search_result
     
     
 class ChromaVectorDB(VectorDB):
-    def __init__(self, settings):
+    def __init__(self, settings, batch_size: int = DEFAULT_BATCH_SIZE):
         self.client = ChromaClient(settings)
         self.collections = {}
+        # Chroma rejects adds larger than the backend's own limit
+        self.batch_size = min(batch_size, self._max_batch_size() or batch_size)
+
+    def _max_batch_size(self) -> Optional[int]:
+        max_batch_size = getattr(self.client, "max_batch_size", None)
+        if max_batch_size is None and hasattr(self.client, "get_max_batch_size"):
+            max_batch_size = self.client.get_max_batch_size()
+        return max_batch_size
 
-    def create_collection(self, collection_name: str):
+    def create_collection(self, collection_name: str, vector_size: Optional[int] = None):
         if collection_name not in self.collections:
-            self.collections[collection_name] = self.client.create_collection(name=collection_name)
+            # Chroma persists collections itself, reuse one created by another process
+            self.collections[collection_name] = self.client.get_or_create_collection(name=collection_name)
 
     def add_vector(self, collection_name: str, vector_id: str, vector: List[float], payload: Dict[str, Any]):
         if collection_name not in self.collections:
@@ -93,11 +295,47 @@ class ChromaVectorDB(VectorDB):
             metadatas=[payload]
         )
 
-    def search_vectors(self, collection_name: str, query_vector: List[float], limit: int):
+    def add_vectors(self, collection_name: str, vector_ids: List[str], vectors: List[List[float]], payloads: List[Dict[str, Any]]):
+        if not vectors:
+            return
+        if collection_name not in self.collections:
+            self.create_collection(collection_name)
+
+        for start in range(0, len(vectors), self.batch_size):
+            end = start + self.batch_size
+            self.collections[collection_name].add(
+                ids=vector_ids[start:end],
+                embeddings=vectors[start:end],
+                metadatas=payloads[start:end]
+            )
+
+    def _get_collection(self, collection_name: str):
+        """Existing collection, discovered on the server if this process has not used it yet."""
         if collection_name not in self.collections:
+            try:
+                self.collections[collection_name] = self.client.get_collection(name=collection_name)
+            except ValueError:
+                return None
+        return self.collections[collection_name]
+
+    def delete_vectors(self, collection_name: str, vector_ids: List[str]):
+        collection = self._get_collection(collection_name) if vector_ids else None
+        if collection is None:
+            return
+        collection.delete(ids=vector_ids)
+
+    def update_payloads(self, collection_name: str, vector_ids: List[str], payloads: List[Dict[str, Any]]):
+        collection = self._get_collection(collection_name) if vector_ids else None
+        if collection is None:
+            return
+        collection.update(ids=vector_ids, metadatas=payloads)
+
+    def search_vectors(self, collection_name: str, query_vector: List[float], limit: int):
+        collection = self._get_collection(collection_name)
+        if collection is None:
             raise ValueError(f"Collection {collection_name} has not been initialized.")
         
-        results = self.collections[collection_name].query(
+        results = collection.query(
             query_embeddings=[query_vector],
             n_results=limit
         )
@@ -3,6 +3,10 @@ from fastapi import Depends
 
 from src.constants import GlobalConfig
 from src.database.manager import DatabaseManager, QdrantVectorDB
+from src.database.collection_registry import CollectionRegistry
+from src.database.qdrant_profiles import QdrantProfiles
+from src.database.flat_vector_store import FlatVectorDB
+from src.database.ivf_vector_store import IVFVectorDB
 from src.constants import GlobalConfig
 import logging
 
@@ -24,9 +28,40 @@ def initialize_database(db_manager: DatabaseManager):
     #     db_manager.create_knowledge_base(user_id, "Default", "Default knowledge base")
     #     logging.info("Default knowledge base created.")
 
+@lru_cache()
+def get_qdrant_profiles() -> QdrantProfiles:
+    return QdrantProfiles(
+        GlobalConfig.QDRANT_PROFILES,
+        default_profile=GlobalConfig.QDRANT_DEFAULT_PROFILE,
+        collections=GlobalConfig.QDRANT_COLLECTION_PROFILES,
+    )
+
+def get_vector_db():
+    if GlobalConfig.MODEL.VECTOR_STORE == "flat":
+        return FlatVectorDB(GlobalConfig.FLAT_VECTOR_DIR, dtype=GlobalConfig.FLAT_VECTOR_DTYPE)
+    if GlobalConfig.MODEL.VECTOR_STORE == "ivf":
+        return IVFVectorDB(
+            GlobalConfig.FLAT_VECTOR_DIR,
+            dtype=GlobalConfig.FLAT_VECTOR_DTYPE,
+            nlist=GlobalConfig.IVF_NLIST,
+            nprobe=GlobalConfig.IVF_NPROBE,
+            quantizer=GlobalConfig.IVF_QUANTIZER,
+            pq_m=GlobalConfig.IVF_PQ_M,
+            rescore=GlobalConfig.IVF_RESCORE,
+            rescore_factor=GlobalConfig.IVF_RESCORE_FACTOR,
+            min_train_rows=GlobalConfig.IVF_MIN_TRAIN_ROWS,
+        )
+    return QdrantVectorDB(
+        GlobalConfig.QDRANT_DB_URL,
+        batch_size=GlobalConfig.VECTOR_UPSERT_BATCH_SIZE,
+        upsert_parallelism=GlobalConfig.VECTOR_UPSERT_PARALLELISM,
+        registry=CollectionRegistry(GlobalConfig.VECTOR_REGISTRY_PATH),
+        profiles=get_qdrant_profiles(),
+    )
+
 def get_database_manager() -> DatabaseManager:
     # You could load these configurations from environment variables or a config file
-    vector_db = QdrantVectorDB(GlobalConfig.QDRANT_DB_URL)
+    vector_db = get_vector_db()
     db_manager = DatabaseManager(GlobalConfig.DATABASE_PATH, vector_db)
     
     # Create a user
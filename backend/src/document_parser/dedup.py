@@ -0,0 +1,175 @@
+import re
+import uuid
+import zlib
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from llama_index.core.schema import Document
+from src.constants import GlobalConfig
+from src.document_parser.embedding import get_embeddings
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_WORD_RE = re.compile(r"\w+")
+# Page numbers only: "Page 3 of 120", "p. 3", or a line holding nothing but "- 3 -" / "3 / 120"
+_PAGE_REF_RE = re.compile(r"\b(?:page|pg|p)\.?\s*\d+(?:\s*(?:of|/)\s*\d+)?\b", re.IGNORECASE)
+_PAGE_LINE_RE = re.compile(r"^[ \t\-\u2013\u2014|]*\d{1,4}(?:[ \t]*/[ \t]*\d{1,4})?[ \t\-\u2013\u2014|]*$", re.MULTILINE)
+
+
+def shingles(text: str, size: int = 5) -> List[str]:
+    """Word ``size``-grams of normalized text.
+
+    Text is lowercased and page numbers are collapsed, so headers and footers that only
+    differ in them ("Page 3 of 120") still match. Other numbers are kept: chunks that
+    differ in figures (exercises, tables, schedules) are not duplicates.
+    """
+    text = _PAGE_LINE_RE.sub("0", _PAGE_REF_RE.sub("page 0", text))
+    words = _WORD_RE.findall(text.lower())
+    if len(words) <= size:
+        return [" ".join(words)]
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class MinHasher:
+    """MinHash signatures over word shingles, stable across processes."""
+
+    def __init__(self, num_perm: int, seed: int = 1):
+        generator = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.a = generator.randint(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self.b = generator.randint(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.array(
+            [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles(text)],
+            dtype=np.uint64,
+        )
+        # Universal hashing a*x + b; uint64 wrap-around is fine for the min-wise property
+        permuted = np.bitwise_and((hashes[:, None] * self.a + self.b) % _MERSENNE_PRIME, _MAX_HASH)
+        return permuted.min(axis=0)
+
+
+class NearDuplicateIndex:
+    """LSH index of MinHash signatures keyed by the canonical chunk's vector id.
+
+    Signatures are split into ``bands`` bands; chunks sharing any band are candidates
+    and are confirmed when their estimated Jaccard similarity reaches ``threshold``.
+    """
+
+    def __init__(self, num_perm: int, bands: int, threshold: float):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.threshold = threshold
+        self.signatures: Dict[str, np.ndarray] = {}
+        self.buckets: List[Dict[bytes, List[str]]] = [defaultdict(list) for _ in range(bands)]
+
+    def _band_keys(self, signature: np.ndarray) -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows].tobytes()
+
+    def add(self, key: str, signature: np.ndarray):
+        self.signatures[key] = signature
+        for band, band_key in self._band_keys(signature):
+            self.buckets[band][band_key].append(key)
+
+    def find(self, signature: np.ndarray) -> Optional[str]:
+        """Key of the most similar indexed chunk above the threshold, if any."""
+        best_key, best_similarity = None, self.threshold
+        seen = set()
+        for band, band_key in self._band_keys(signature):
+            for key in self.buckets[band].get(band_key, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                similarity = float(np.mean(self.signatures[key] == signature))
+                if similarity >= best_similarity:
+                    best_key, best_similarity = key, similarity
+        return best_key
+
+
+class ChunkDeduplicator:
+    """Collapse near-duplicate chunks (headers, footers, licence pages) before embedding.
+
+    Unique chunks get a fresh vector id and are embedded; near-duplicates reference
+    the vector id of the first matching chunk through ``duplicate_of`` and are stored
+    without a vector of their own.
+    """
+
+    def __init__(
+        self,
+        existing: Iterable[Tuple[str, bytes]] = (),
+        threshold: float = GlobalConfig.DEDUP_THRESHOLD,
+        num_perm: int = GlobalConfig.DEDUP_NUM_PERM,
+        bands: int = GlobalConfig.DEDUP_BANDS,
+    ):
+        self.hasher = MinHasher(num_perm)
+        self.index = NearDuplicateIndex(num_perm, bands, threshold)
+        self.duplicates = 0
+        for vector_id, minhash in existing:
+            signature = np.frombuffer(minhash, dtype=np.uint64)
+            if len(signature) == num_perm:
+                self.index.add(vector_id, signature)
+
+    def build_records(self, chunks: List[Document], chunk_indexes: List[int]) -> List[Dict]:
+        """Records for ``DatabaseManager.add_document_chunks``, embedding unique chunks only."""
+        records = []
+        to_embed = []
+        for chunk, chunk_index in zip(chunks, chunk_indexes):
+            signature = self.hasher.signature(chunk.text)
+            record = {
+                "chunk_index": chunk_index,
+                "content": chunk.text,
+                "metadata": chunk.metadata,
+                "minhash": signature.tobytes(),
+            }
+            canonical = self.index.find(signature)
+            if canonical is not None:
+                record["duplicate_of"] = canonical
+                self.duplicates += 1
+            else:
+                record["vector_id"] = str(uuid.uuid4())
+                self.index.add(record["vector_id"], signature)
+                to_embed.append(record)
+            records.append(record)
+
+        vectors = get_embeddings([record["content"] for record in to_embed])
+        for record, vector in zip(to_embed, vectors):
+            record["vector"] = vector
+        if len(to_embed) < len(records):
+            logging.info(f"Skipped embedding {len(records) - len(to_embed)} near-duplicate chunks")
+        return records
+
+
+def build_chunk_records(
+    chunks: List[Document],
+    chunk_indexes: List[int],
+    deduplicator: Optional[ChunkDeduplicator] = None,
+) -> List[Dict]:
+    """Embed ``chunks`` into ``add_document_chunks`` records, collapsing near-duplicates when enabled."""
+    if deduplicator is not None:
+        return deduplicator.build_records(chunks, chunk_indexes)
+    vectors = get_embeddings([chunk.text for chunk in chunks])
+    return [
+        {
+            "chunk_index": chunk_index,
+            "content": chunk.text,
+            "vector": vector,
+            "metadata": chunk.metadata,
+        }
+        for chunk, chunk_index, vector in zip(chunks, chunk_indexes, vectors)
+    ]
+
+
+def create_deduplicator(db_manager, document_id: int) -> Optional[ChunkDeduplicator]:
+    """Deduplicator seeded with the stored chunks in ``DEDUP_SCOPE``, None when disabled."""
+    if not GlobalConfig.DEDUP_ENABLED:
+        return None
+    if GlobalConfig.DEDUP_SCOPE == "knowledge_base":
+        document = db_manager.get_document(document_id)
+        existing = db_manager.get_chunk_signatures(knowledge_base_id=document.knowledge_base_id)
+    else:
+        existing = db_manager.get_chunk_signatures(document_id=document_id)
+    return ChunkDeduplicator(existing)
@@ -1,12 +1,96 @@
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.utils import get_tokenizer
 from llama_index.embeddings.openai import OpenAIEmbedding
 from src.constants import GlobalConfig
-from src.constants import GlobalConfig
+from src.document_parser.embedding_cache import get_embedding_cache, hash_text
 
 
-def get_embedding(chunk: str, service = GlobalConfig.MODEL.EMBEDDING_SERVICE, model_name = GlobalConfig.MODEL.EMBEDDING_MODEL_NAME):
+@lru_cache()
+def get_embed_model(service = GlobalConfig.MODEL.EMBEDDING_SERVICE, model_name = GlobalConfig.MODEL.EMBEDDING_MODEL_NAME) -> BaseEmbedding:
+    # Cached so every worker process keeps a single client (and its connection pool)
     if service == 'openai':
-        embed_model = OpenAIEmbedding(model=model_name, api_key=GlobalConfig.MODEL.OPENAI_API_KEY)
+        return OpenAIEmbedding(
+            model=model_name,
+            api_key=GlobalConfig.MODEL.OPENAI_API_KEY,
+            embed_batch_size=GlobalConfig.MODEL.EMBEDDING_BATCH_SIZE,
+        )
     else:
         raise ValueError(f"Invalid embedding service: {service}")
-    
-    return embed_model.get_text_embedding(chunk)
\ No newline at end of file
+
+
+def get_embedding(chunk: str, service = GlobalConfig.MODEL.EMBEDDING_SERVICE, model_name = GlobalConfig.MODEL.EMBEDDING_MODEL_NAME):
+    return get_embed_model(service, model_name).get_text_embedding(chunk)
+
+
+def make_batches(chunks: List[str], batch_size: int, max_tokens: int) -> List[List[str]]:
+    """Group chunks into batches bounded by both chunk count and token count.
+
+    A chunk that exceeds ``max_tokens`` on its own is sent as a single-item batch.
+    """
+    tokenizer = get_tokenizer()
+    batches = []
+    current, current_tokens = [], 0
+    for chunk in chunks:
+        num_tokens = len(tokenizer(chunk))
+        if current and (len(current) >= batch_size or current_tokens + num_tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(chunk)
+        current_tokens += num_tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def get_embeddings(
+    chunks: List[str],
+    service = GlobalConfig.MODEL.EMBEDDING_SERVICE,
+    model_name = GlobalConfig.MODEL.EMBEDDING_MODEL_NAME,
+    batch_size: int = GlobalConfig.MODEL.EMBEDDING_BATCH_SIZE,
+    max_tokens: int = GlobalConfig.MODEL.EMBEDDING_MAX_TOKENS_PER_BATCH,
+    concurrency: int = GlobalConfig.MODEL.EMBEDDING_CONCURRENCY,
+    use_cache: bool = GlobalConfig.EMBEDDING_CACHE_ENABLED,
+) -> List[List[float]]:
+    """Embed many chunks with batched requests, several batches in flight at once.
+
+    When ``use_cache`` is set, only chunks missing from the on-disk embedding cache
+    are sent to the embedding service. Returns the embeddings in the same order as
+    ``chunks``.
+    """
+    if not chunks:
+        return []
+
+    text_hashes = [hash_text(chunk) for chunk in chunks]
+    cached = {}
+    if use_cache:
+        cache = get_embedding_cache()
+        cached = cache.get_many(service, model_name, text_hashes)
+
+    # Embed each distinct uncached text once
+    pending = {}
+    for text_hash, chunk in zip(text_hashes, chunks):
+        if text_hash not in cached:
+            pending.setdefault(text_hash, chunk)
+
+    if pending:
+        embed_model = get_embed_model(service, model_name)
+        batches = make_batches(list(pending.values()), batch_size, max_tokens)
+
+        def embed_batch(batch: List[str]) -> List[List[float]]:
+            return embed_model.get_text_embedding_batch(batch)
+
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            results = executor.map(embed_batch, batches)
+            new_embeddings = dict(zip(
+                pending,
+                (embedding for batch_embeddings in results for embedding in batch_embeddings),
+            ))
+
+        if use_cache:
+            cache.put_many(service, model_name, new_embeddings)
+        cached.update(new_embeddings)
+
+    return [cached[text_hash] for text_hash in text_hashes]
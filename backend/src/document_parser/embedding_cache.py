@@ -0,0 +1,169 @@
+import hashlib
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from array import array
+from functools import lru_cache
+from typing import Dict, List
+
+from src.constants import GlobalConfig
+
+# SQLite caps the number of bound parameters per statement
+MAX_QUERY_PARAMS = 500
+# Evict down to this fraction of the size limit so we don't evict on every write
+EVICTION_TARGET_RATIO = 0.9
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk embedding cache keyed by (service, model name, sha256 of the text).
+
+    Backed by a SQLite file in WAL mode so several Celery workers can share it.
+    Entries are evicted least-recently-used first once the stored vectors exceed
+    ``max_size_bytes``. Hit/miss counters are kept both per process (``hits`` and
+    ``misses``) and in the file itself (``get_stats``).
+    """
+
+    def __init__(self, db_path: str, max_size_bytes: int):
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.db_path = db_path
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS embeddings (
+                    service TEXT NOT NULL,
+                    model_name TEXT NOT NULL,
+                    text_hash TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL,
+                    PRIMARY KEY (service, model_name, text_hash)
+                )
+                """
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (last_used)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+
+    @staticmethod
+    def _pack(vector: List[float]) -> bytes:
+        return array("f", vector).tobytes()
+
+    @staticmethod
+    def _unpack(blob: bytes) -> List[float]:
+        vector = array("f")
+        vector.frombytes(blob)
+        return vector.tolist()
+
+    def get_many(self, service: str, model_name: str, text_hashes: List[str]) -> Dict[str, List[float]]:
+        """Return the cached vectors for ``text_hashes``, keyed by hash."""
+        unique_hashes = list(dict.fromkeys(text_hashes))
+        found = {}
+        now = time.time()
+        with self._lock, self._conn:
+            for start in range(0, len(unique_hashes), MAX_QUERY_PARAMS):
+                batch = unique_hashes[start:start + MAX_QUERY_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings "
+                    f"WHERE service = ? AND model_name = ? AND text_hash IN ({placeholders})",
+                    (service, model_name, *batch),
+                ).fetchall()
+                found.update({text_hash: self._unpack(blob) for text_hash, blob in rows})
+
+            if found:
+                hit_hashes = list(found)
+                for start in range(0, len(hit_hashes), MAX_QUERY_PARAMS):
+                    batch = hit_hashes[start:start + MAX_QUERY_PARAMS]
+                    placeholders = ",".join("?" * len(batch))
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_used = ? "
+                        f"WHERE service = ? AND model_name = ? AND text_hash IN ({placeholders})",
+                        (now, service, model_name, *batch),
+                    )
+
+            hits = len(found)
+            misses = len(unique_hashes) - hits
+            self._increment_stats(hits=hits, misses=misses)
+        self.hits += hits
+        self.misses += misses
+        return found
+
+    def put_many(self, service: str, model_name: str, entries: Dict[str, List[float]]):
+        """Store ``{text_hash: vector}`` entries, evicting old ones if over the size limit."""
+        if not entries:
+            return
+        now = time.time()
+        rows = []
+        for text_hash, vector in entries.items():
+            blob = self._pack(vector)
+            rows.append((service, model_name, text_hash, blob, len(blob), now))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings "
+                "(service, model_name, text_hash, vector, size, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict()
+
+    def _evict(self):
+        total_size, count = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM embeddings"
+        ).fetchone()
+        if total_size <= self.max_size_bytes or count == 0:
+            return
+        excess = total_size - self.max_size_bytes * EVICTION_TARGET_RATIO
+        num_evicted = min(count, math.ceil(excess / (total_size / count)))
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE rowid IN "
+            "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+            (num_evicted,),
+        )
+        self._increment_stats(evictions=num_evicted)
+        logging.info(f"Embedding cache evicted {num_evicted} entries")
+
+    def _increment_stats(self, **counters: int):
+        self._conn.executemany(
+            "INSERT INTO stats (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            [(name, value) for name, value in counters.items() if value],
+        )
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._conn.execute("SELECT name, value FROM stats").fetchall())
+            total_size, count = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM embeddings"
+            ).fetchone()
+        return {
+            "hits": stats.get("hits", 0),
+            "misses": stats.get("misses", 0),
+            "evictions": stats.get("evictions", 0),
+            "entries": count,
+            "size_bytes": total_size,
+        }
+
+
+@lru_cache()
+def get_embedding_cache() -> EmbeddingCache:
+    # Opened lazily so each forked worker process gets its own connection
+    return EmbeddingCache(
+        GlobalConfig.EMBEDDING_CACHE_PATH,
+        GlobalConfig.EMBEDDING_CACHE_MAX_SIZE_MB * 1024 * 1024,
+    )
@@ -0,0 +1,186 @@
+import queue
+import logging
+import threading
+from bisect import bisect_right
+from typing import Callable, Iterable, List, Optional, Tuple
+from llama_index.core.text_splitter import SentenceSplitter
+from llama_index.core.schema import Document
+from src.document_parser.dedup import ChunkDeduplicator, build_chunk_records
+from src.database.manager import DatabaseManager
+
+_SENTINEL = object()
+# How long a blocked stage waits before re-checking whether another stage failed
+_POLL_INTERVAL = 0.5
+
+
+def _chunk_offsets(text: str, chunks: List[str]) -> List[int]:
+    """Start offset of every chunk in ``text``; chunks are in order but may overlap."""
+    offsets, cursor = [], 0
+    for chunk in chunks:
+        found = text.find(chunk, cursor)
+        offset = found if found >= 0 else cursor
+        offsets.append(offset)
+        cursor = offset + 1
+    return offsets
+
+
+def iter_split(
+    docs: Iterable[Document],
+    splitter: Optional[SentenceSplitter] = None,
+    buffer_chars: int = 32000,
+) -> Iterable[Document]:
+    """Incrementally split a stream of documents (pages, sections, messages) into chunks.
+
+    Text is buffered until ``buffer_chars`` is reached, then split. The last chunk of
+    every split is carried over and merged with the following text so chunks can still
+    span page boundaries, while at most one buffer of text is held in memory. Every
+    chunk gets the metadata of the document its text starts in.
+    """
+    splitter = splitter or SentenceSplitter()
+    buffer = ""
+    # Start offset in ``buffer`` and metadata of each document with text in the buffer
+    sources: List[Tuple[int, dict]] = []
+
+    def with_metadata(chunks: List[str]) -> List[Document]:
+        source_offsets = [offset for offset, _ in sources]
+        return [
+            Document(text=chunk, metadata=sources[max(bisect_right(source_offsets, offset) - 1, 0)][1])
+            for chunk, offset in zip(chunks, _chunk_offsets(buffer, chunks))
+        ]
+
+    for doc in docs:
+        sources.append((len(buffer) + 1 if buffer else 0, doc.metadata))
+        buffer = f"{buffer}\n{doc.text}" if buffer else doc.text
+        if len(buffer) < buffer_chars:
+            continue
+
+        chunks = splitter.split_text(buffer)
+        if not chunks:
+            buffer, sources = "", []
+            continue
+        documents = with_metadata(chunks)
+        yield from documents[:-1]
+
+        # Carry the last chunk over, keeping the sources its text comes from
+        tail_offset = _chunk_offsets(buffer, chunks)[-1]
+        source_ends = [offset for offset, _ in sources[1:]] + [len(buffer)]
+        sources = [
+            (max(offset - tail_offset, 0), metadata)
+            for (offset, metadata), end in zip(sources, source_ends)
+            if end > tail_offset
+        ] or [(0, documents[-1].metadata)]
+        buffer = chunks[-1]
+
+    if buffer:
+        yield from with_metadata(splitter.split_text(buffer))
+
+
+class StreamingIngestionPipeline:
+    """Reader -> splitter -> embed -> upsert pipeline connected by bounded queues.
+
+    The calling thread produces chunk batches, a background thread embeds them and
+    another one persists them through ``DatabaseManager.add_document_chunks``. Queue
+    sizes bound how many batches are held in memory at any time, and every batch is
+    searchable as soon as it is upserted.
+    """
+
+    def __init__(
+        self,
+        db_manager: DatabaseManager,
+        document_id: int,
+        batch_size: int,
+        queue_size: int = 2,
+        on_progress: Optional[Callable[[int], None]] = None,
+        deduplicator: Optional[ChunkDeduplicator] = None,
+    ):
+        self.db_manager = db_manager
+        self.document_id = document_id
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.on_progress = on_progress
+        self.deduplicator = deduplicator
+
+    def run(self, chunks: Iterable[Document], index_offset: int = 0) -> int:
+        """Ingest ``chunks`` and return the number of chunks stored.
+
+        Chunks are numbered from ``index_offset``.
+        """
+        embed_queue = queue.Queue(maxsize=self.queue_size)
+        upsert_queue = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        errors: List[Exception] = []
+        stored = [0]
+
+        def put(q: queue.Queue, item) -> bool:
+            while not stop.is_set():
+                try:
+                    q.put(item, timeout=_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def get(q: queue.Queue):
+            while not stop.is_set():
+                try:
+                    return q.get(timeout=_POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            return _SENTINEL
+
+        def fail(e: Exception):
+            logging.error(f"Ingestion pipeline failed for document {self.document_id}: {e}")
+            errors.append(e)
+            stop.set()
+
+        def embed_stage():
+            try:
+                while (item := get(embed_queue)) is not _SENTINEL:
+                    start, batch = item
+                    records = build_chunk_records(
+                        batch, list(range(start, start + len(batch))), self.deduplicator
+                    )
+                    if not put(upsert_queue, (start, records)):
+                        return
+                put(upsert_queue, _SENTINEL)
+            except Exception as e:
+                fail(e)
+
+        def upsert_stage():
+            try:
+                while (item := get(upsert_queue)) is not _SENTINEL:
+                    start, records = item
+                    self.db_manager.add_document_chunks(document_id=self.document_id, chunks=records)
+                    stored[0] = start + len(records) - index_offset
+                    if self.on_progress:
+                        self.on_progress(stored[0])
+            except Exception as e:
+                fail(e)
+
+        workers = [
+            threading.Thread(target=embed_stage, daemon=True),
+            threading.Thread(target=upsert_stage, daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            start, batch = index_offset, []
+            for chunk in chunks:
+                batch.append(chunk)
+                if len(batch) >= self.batch_size:
+                    if not put(embed_queue, (start, batch)):
+                        break
+                    start, batch = start + len(batch), []
+            if batch:
+                put(embed_queue, (start, batch))
+            put(embed_queue, _SENTINEL)
+        except Exception as e:
+            fail(e)
+        finally:
+            for worker in workers:
+                worker.join()
+
+        if errors:
+            raise errors[0]
+        return stored[0]
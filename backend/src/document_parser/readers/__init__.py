@@ -1,19 +1,25 @@
-from llama_index.readers.file import (
-    DocxReader,
-    HWPReader,
-    EpubReader,
-    FlatReader,
-    HTMLTagReader,
-    IPYNBReader,
-    MarkdownReader,
-    MboxReader,
-    PptxReader,
-    CSVReader,
-    XMLReader,
-    RTFReader,
-)
-from .pdf_reader import PDFReader, LlamaParseReader
-from .video_reader import VideoReader
+import importlib
+
+# Readers are imported on first access: the video and PDF readers pull in heavy
+# clients (Gemini, OpenAI, LlamaParse) that most processes never use.
+_READER_MODULES = {
+    "PDFReader": ".pdf_reader",
+    "LlamaParseReader": ".pdf_reader",
+    "EpubReader": ".streaming_readers",
+    "MboxReader": ".streaming_readers",
+    "VideoReader": ".video_reader",
+    "AudioReader": ".audio_reader",
+    "DocxReader": "llama_index.readers.file",
+    "HWPReader": "llama_index.readers.file",
+    "FlatReader": "llama_index.readers.file",
+    "HTMLTagReader": "llama_index.readers.file",
+    "IPYNBReader": "llama_index.readers.file",
+    "MarkdownReader": "llama_index.readers.file",
+    "PptxReader": "llama_index.readers.file",
+    "CSVReader": "llama_index.readers.file",
+    "XMLReader": "llama_index.readers.file",
+    "RTFReader": "llama_index.readers.file",
+}
 
 __all__ = [
     "PDFReader",
@@ -30,5 +36,20 @@ __all__ = [
     "XMLReader",
     "RTFReader",
     "VideoReader",
+    "AudioReader",
     "LlamaParseReader"
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str):
+    module_name = _READER_MODULES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    reader_class = getattr(importlib.import_module(module_name, __name__), name)
+    # Cache on the package so later lookups skip __getattr__
+    globals()[name] = reader_class
+    return reader_class
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
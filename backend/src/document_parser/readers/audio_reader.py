@@ -0,0 +1,16 @@
+import logging
+from .video_reader import VideoReader
+
+
+class AudioReader(VideoReader):
+    """Transcribe and summarize audio files (podcasts, lectures) through the video pipeline.
+
+    The file is fed to the transcription and summary stages as is, there is no
+    extraction step.
+    """
+
+    media_type = "audio"
+
+    async def _aextract_audio(self, audio_file_path: str) -> str:
+        logging.info("Audio input, skipping extraction.")
+        return audio_file_path
@@ -1,8 +1,10 @@
 import io
 import os
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 from tenacity import retry, stop_after_attempt
 
@@ -13,21 +15,132 @@ from llama_index.core.readers.file.base import get_default_fs, is_default_fs
 from llama_index.core.schema import Document
 from llama_parse import LlamaParse
 from dotenv import load_dotenv
+from src.constants import GlobalConfig
 
 load_dotenv(override=True)
 logger = logging.getLogger(__name__)
 
 RETRY_TIMES = 3
+PDF_BACKENDS = ("pypdf", "pymupdf")
+
+
+def _import_fitz():
+    try:
+        import fitz
+    except ImportError:
+        raise ImportError(
+            "PyMuPDF is required for the pymupdf PDF backend: `pip install pymupdf`"
+        )
+    return fitz
+
+
+def _extract_page_range(file_path: str, start: int, end: int, backend: str) -> List[Tuple[str, str]]:
+    """Extract ``(page_label, text)`` for pages ``[start, end)``.
+
+    Module level so it can be pickled and run in a worker process.
+    """
+    if backend == "pymupdf":
+        fitz = _import_fitz()
+        with fitz.open(file_path) as pdf:
+            return [
+                (pdf[page].get_label() or str(page + 1), pdf[page].get_text())
+                for page in range(start, end)
+            ]
+
+    import pypdf
+
+    pdf = pypdf.PdfReader(file_path)
+    # page_labels is recomputed on every access, read it once
+    page_labels = pdf.page_labels
+    return [(page_labels[page], pdf.pages[page].extract_text()) for page in range(start, end)]
+
+
+def _count_pages(file_path: str, backend: str) -> int:
+    if backend == "pymupdf":
+        fitz = _import_fitz()
+        with fitz.open(file_path) as pdf:
+            return pdf.page_count
+
+    import pypdf
+
+    return len(pypdf.PdfReader(file_path).pages)
 
 
 class PDFReader(BaseReader):
-    """PDF parser."""
+    """PDF parser.
+
+    Pages can be extracted in parallel by a process pool (``num_workers > 1``), split
+    into ranges of ``pages_per_task`` pages. Page order and ``page_label`` metadata are
+    preserved. ``backend`` selects the text extractor: ``pypdf`` (default) or the
+    faster ``pymupdf``. ``page_range`` restricts reading to pages ``[start, end)``.
+    """
 
-    def __init__(self, return_full_document: Optional[bool] = True) -> None:
+    def __init__(
+        self,
+        return_full_document: Optional[bool] = True,
+        num_workers: int = GlobalConfig.PDF_EXTRACTION_WORKERS,
+        backend: str = GlobalConfig.PDF_BACKEND,
+        pages_per_task: int = GlobalConfig.PDF_PAGES_PER_TASK,
+        page_range: Optional[Tuple[int, int]] = None,
+    ) -> None:
         """
         Initialize PDFReader.
         """
+        if backend not in PDF_BACKENDS:
+            raise ValueError(f"Invalid PDF backend: {backend}. Expected one of {PDF_BACKENDS}")
         self.return_full_document = return_full_document
+        self.num_workers = num_workers
+        self.backend = backend
+        self.pages_per_task = max(1, pages_per_task)
+        self.page_range = page_range
+
+    def count_pages(self, file: Path) -> int:
+        return _count_pages(str(file), self.backend)
+
+    def _iter_pages(self, file: Path, fs: Optional[AbstractFileSystem] = None) -> Iterable[Tuple[str, str]]:
+        """Yield ``(page_label, text)`` for every page, in page order."""
+        fs = fs or get_default_fs()
+        if not is_default_fs(fs):
+            # Load the file in memory if the filesystem is not the default one to avoid
+            # issues with pypdf
+            import pypdf
+
+            with fs.open(file, "rb") as fp:
+                pdf = pypdf.PdfReader(io.BytesIO(fp.read()))
+                page_labels = pdf.page_labels
+                first_page, last_page = self.page_range or (0, len(pdf.pages))
+                for page in range(first_page, min(last_page, len(pdf.pages))):
+                    yield page_labels[page], pdf.pages[page].extract_text()
+            return
+
+        file_path = str(file)
+        num_pages = _count_pages(file_path, self.backend)
+        first_page, last_page = self.page_range or (0, num_pages)
+        last_page = min(last_page, num_pages)
+        ranges = [
+            (start, min(start + self.pages_per_task, last_page))
+            for start in range(first_page, last_page, self.pages_per_task)
+        ]
+
+        if self.num_workers <= 1 or len(ranges) <= 1 or multiprocessing.current_process().daemon:
+            for start, end in ranges:
+                yield from _extract_page_range(file_path, start, end, self.backend)
+            return
+
+        logger.info(f"Extracting {last_page - first_page} pages with {self.num_workers} processes")
+        # Spawn rather than fork: in streaming mode the pipeline's threads are running and a
+        # forked worker could inherit a lock one of them holds
+        with ProcessPoolExecutor(max_workers=self.num_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+            # map returns results in submission order, so pages stay in order
+            results = executor.map(
+                _extract_page_range,
+                [file_path] * len(ranges),
+                [start for start, _ in ranges],
+                [end for _, end in ranges],
+                [self.backend] * len(ranges),
+            )
+            for pages in results:
+                yield from pages
 
     @retry(
         stop=stop_after_attempt(RETRY_TIMES),
@@ -42,55 +155,36 @@ class PDFReader(BaseReader):
         if not isinstance(file, Path):
             file = Path(file)
 
-        try:
-            import pypdf
-        except ImportError:
-            raise ImportError(
-                "pypdf is required to read PDF files: `pip install pypdf`"
-            )
-        fs = fs or get_default_fs()
-        with fs.open(file, "rb") as fp:
-            # Load the file in memory if the filesystem is not the default one to avoid
-            # issues with pypdf
-            stream = fp if is_default_fs(fs) else io.BytesIO(fp.read())
-
-            # Create a PDF object
-            pdf = pypdf.PdfReader(stream)
-
-            # Get the number of pages in the PDF document
-            num_pages = len(pdf.pages)
+        # This block returns a whole PDF as a single Document
+        if self.return_full_document:
+            metadata = {"file_name": file.name}
+            if extra_info is not None:
+                metadata.update(extra_info)
 
-            docs = []
+            # Join text extracted from each page
+            text = "\n".join(page_text for _, page_text in self._iter_pages(file, fs))
 
-            # This block returns a whole PDF as a single Document
-            if self.return_full_document:
-                metadata = {"file_name": file.name}
-                if extra_info is not None:
-                    metadata.update(extra_info)
+            return [Document(text=text, metadata=metadata)]
 
-                # Join text extracted from each page
-                text = "\n".join(
-                    pdf.pages[page].extract_text() for page in range(num_pages)
-                )
+        # This block returns each page of a PDF as its own Document
+        return list(self.lazy_load_data(file, extra_info=extra_info, fs=fs))
 
-                docs.append(Document(text=text, metadata=metadata))
-
-            # This block returns each page of a PDF as its own Document
-            else:
-                # Iterate over every page
-
-                for page in range(num_pages):
-                    # Extract the text from the page
-                    page_text = pdf.pages[page].extract_text()
-                    page_label = pdf.page_labels[page]
-
-                    metadata = {"page_label": page_label, "file_name": file.name}
-                    if extra_info is not None:
-                        metadata.update(extra_info)
+    def lazy_load_data(
+        self,
+        file: Path,
+        extra_info: Optional[Dict] = None,
+        fs: Optional[AbstractFileSystem] = None,
+    ) -> Iterable[Document]:
+        """Parse file page by page, yielding each page as soon as it is extracted."""
+        if not isinstance(file, Path):
+            file = Path(file)
 
-                    docs.append(Document(text=page_text, metadata=metadata))
+        for page_label, page_text in self._iter_pages(file, fs):
+            metadata = {"page_label": page_label, "file_name": file.name}
+            if extra_info is not None:
+                metadata.update(extra_info)
 
-            return docs
+            yield Document(text=page_text, metadata=metadata)
         
         
 # wrapper around llama parse
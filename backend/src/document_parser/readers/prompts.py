@@ -35,4 +35,48 @@ The output should be in JSON format
 - Avoid spoilers in the overall summary.
 
 Aim to provide a quick understanding of the video's content, structure, and key messages.
-"""
\ No newline at end of file
+"""
+VIDEO_WINDOW_PROCESSING_PROMPT = """
+You are an AI designed to analyze and summarize video content. You are given one
+window of a longer recording. Your tasks:
+
+1. Generate a brief summary of this window (3-5 sentences).
+2. Identify key sections in this window, create timestamps, and provide detailed summaries.
+
+## Guidelines:
+
+- Timestamps are relative to the start of this window, which starts at 00:00:00.
+- Do not refer to "this window" or "this clip" in the summaries.
+- Be objective and clear.
+
+## Output Format:
+The output should be in JSON format
+
+{
+    "summary": "Summary of the window in 3 - 5 sentences",
+    "sections": [
+        {
+            "start_time": "time stamp in HH:MM:SS format",
+            "end_time": "time stamp in HH:MM:SS format",
+            "summary": "detailed summary of the section",
+        },
+        ...
+    ]
+}
+"""
+
+VIDEO_SUMMARY_REDUCE_PROMPT = """
+You are given the summaries of consecutive parts of one video, in order. Write a
+brief overall summary of the whole video (5-10 sentences) that reads as a single
+summary, not as a list of parts. Avoid spoilers.
+
+## Part summaries:
+{window_summaries}
+
+## Output Format:
+The output should be in JSON format
+
+{{
+    "summary": "Summary of the video in 5 - 10 sentences"
+}}
+"""
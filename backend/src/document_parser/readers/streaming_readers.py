@@ -0,0 +1,136 @@
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from fsspec import AbstractFileSystem
+
+from llama_index.core.schema import Document
+from llama_index.readers.file import (
+    EpubReader as BaseEpubReader,
+    MboxReader as BaseMboxReader,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class EpubReader(BaseEpubReader):
+    """Epub parser that yields one Document per chapter."""
+
+    def __init__(self, return_full_document: Optional[bool] = True) -> None:
+        self.return_full_document = return_full_document
+
+    def lazy_load_data(
+        self,
+        file: Path,
+        extra_info: Optional[Dict] = None,
+        fs: Optional[AbstractFileSystem] = None,
+    ) -> Iterable[Document]:
+        """Parse file chapter by chapter."""
+        try:
+            import ebooklib
+            import html2text
+            from ebooklib import epub
+        except ImportError:
+            raise ImportError(
+                "Please install extra dependencies that are required for "
+                "the EpubReader: "
+                "`pip install EbookLib html2text`"
+            )
+        if fs:
+            logger.warning(
+                "fs was specified but EpubReader doesn't support loading "
+                "from fsspec filesystems. Will load from local filesystem instead."
+            )
+
+        book = epub.read_epub(file, options={"ignore_ncx": True})
+
+        # Chapters are typically located in epub documents items.
+        for item in book.get_items():
+            if item.get_type() == ebooklib.ITEM_DOCUMENT:
+                yield Document(
+                    text=html2text.html2text(item.get_content().decode("utf-8")),
+                    metadata=extra_info or {},
+                )
+
+    def load_data(
+        self,
+        file: Path,
+        extra_info: Optional[Dict] = None,
+        fs: Optional[AbstractFileSystem] = None,
+    ) -> List[Document]:
+        """Parse file."""
+        docs = list(self.lazy_load_data(file, extra_info=extra_info, fs=fs))
+        if self.return_full_document:
+            return [Document(text="\n".join(doc.text for doc in docs), metadata=extra_info or {})]
+        return docs
+
+
+class MboxReader(BaseMboxReader):
+    """Mbox parser that yields one Document per message."""
+
+    def __init__(self, *args, return_full_document: Optional[bool] = True, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.return_full_document = return_full_document
+
+    def lazy_load_data(
+        self,
+        file: Path,
+        extra_info: Optional[Dict] = None,
+        fs: Optional[AbstractFileSystem] = None,
+    ) -> Iterable[Document]:
+        """Parse file message by message."""
+        import mailbox
+        from email.parser import BytesParser
+        from email.policy import default
+
+        from bs4 import BeautifulSoup
+
+        if fs:
+            logger.warning(
+                "fs was specified but MboxReader doesn't support loading "
+                "from fsspec filesystems. Will load from local filesystem instead."
+            )
+
+        bytes_parser = BytesParser(policy=default).parse
+        mbox = mailbox.mbox(file, factory=bytes_parser)  # type: ignore
+
+        # mailbox.mbox only keeps message offsets in memory, each message is read on access
+        for i, msg in enumerate(mbox):
+            try:
+                content = None
+                if msg.is_multipart():
+                    for part in msg.walk():
+                        ctype = part.get_content_type()
+                        cdispo = str(part.get("Content-Disposition"))
+                        if ctype == "text/plain" and "attachment" not in cdispo:
+                            content = part.get_payload(decode=True)
+                            break
+                else:
+                    content = msg.get_payload(decode=True)
+
+                soup = BeautifulSoup(content or b"")
+                stripped_content = " ".join(soup.get_text().split())
+                yield Document(
+                    text=self.message_format.format(
+                        _date=msg["date"],
+                        _from=msg["from"],
+                        _to=msg["to"],
+                        _subject=msg["subject"],
+                        _content=stripped_content,
+                    ),
+                    metadata=extra_info or {},
+                )
+            except Exception as e:
+                logger.warning(f"Failed to parse message {i} with exception {e}")
+
+            if self.max_count > 0 and i + 1 >= self.max_count:
+                break
+
+    def load_data(
+        self,
+        file: Path,
+        extra_info: Optional[Dict] = None,
+        fs: Optional[AbstractFileSystem] = None,
+    ) -> List[Document]:
+        """Parse file into one Document per message."""
+        return list(self.lazy_load_data(file, extra_info=extra_info, fs=fs))
@@ -1,80 +1,122 @@
 import os
 import re
 import json
+import time
+import shutil
 import tempfile
 import asyncio
+from bisect import bisect_right
 from typing import List, Dict
-from moviepy.editor import VideoFileClip
 import google.generativeai as genai
 from dotenv import load_dotenv
 from openai import OpenAI
-from pydub import AudioSegment
 import aiofiles
 import aiofiles.os
 from openai.resources.audio.transcriptions import Transcription
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential
 from src.constants import GlobalConfig
+from src.utils.ffmpeg import extract_audio, segment_audio
+from src.document_parser.transcript import TranscriptIndex, format_timestamp, parse_timestamp
 import logging
-from .prompts import VIDEO_PROCESSING_PROMPT
+from .prompts import VIDEO_PROCESSING_PROMPT, VIDEO_WINDOW_PROCESSING_PROMPT, VIDEO_SUMMARY_REDUCE_PROMPT
 from llama_index.core.readers.base import BaseReader
 from llama_index.core.schema import Document
 load_dotenv(override=True)
 
 class VideoReader:
+    media_type = "video"
+
     def __init__(self):
         self.GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY")
         self.OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
         genai.configure(api_key=self.GOOGLE_API_KEY)
         self.gemini_model = genai.GenerativeModel(model_name="models/gemini-1.5-flash")
         self.openai_client = OpenAI(api_key=self.OPENAI_API_KEY)
-        self.max_concurrent_requests = GlobalConfig.MAX_CONCURRENT_REQUESTS
+        self.max_concurrent_requests = GlobalConfig.TRANSCRIPTION_CONCURRENCY
         self.output_dir = GlobalConfig.UPLOAD_FOLDER
+        # Timestamped segments of the last loaded video, persisted by the document task
+        self.transcript: List[Dict] = []
 
     async def load_data(self, video_path: str) -> List[Dict]:
         logging.info(f"Processing video: {video_path}")
-        audio_path = await self._aextract_audio(video_path)
+        started = time.perf_counter()
+        timings = {}
+
+        audio_path = await self._atimed(timings, "audio_extraction", self._aextract_audio(video_path))
         logging.info("Audio extraction complete.")
 
-        audio_chunk_filepaths = await self._asplit_audio(audio_path)
-        logging.info(f"Audio split into {len(audio_chunk_filepaths)} chunks.")
+        try:
+            # Transcription and summarization only share the extracted audio, run them side by side
+            transcript, summary = await self._arun_concurrently(
+                self._atimed(timings, "transcription", self._atranscribe(audio_path)),
+                self._atimed(timings, "summary", self._get_summary(audio_path)),
+            )
+            logging.info("Transcription and summary generation complete.")
+        finally:
+            if audio_path != video_path:
+                await aiofiles.os.remove(audio_path)
+                logging.info("Temporary files removed.")
 
-        transcript = await self._atranscribe_and_combine(audio_chunk_filepaths)
-        logging.info("Transcription complete.")
+        self.transcript = transcript
+        section_started = time.perf_counter()
+        sections = self._process_sections(summary, TranscriptIndex(transcript))
+        timings["section_assembly"] = round(time.perf_counter() - section_started, 3)
+        timings["total"] = round(time.perf_counter() - started, 3)
+        logging.info(f"Sections processed. Stage timings (s): {timings}")
+        # Section clips are cut on demand, see src.utils.clip_cache
 
-        summary = await self._get_summary(audio_path)
-        logging.info("Summary generation complete.")
+        return [
+            Document(text=section["text"], metadata={**section["metadata"], f"{self.media_type}_path": video_path, "stage_timings": timings})
+            for section in sections
+        ]
 
-        sections = self._process_sections(summary, transcript)
-        logging.info("Sections processed.")
-        
-        # await asyncio.to_thread(self._cut_video_sections, video_path, sections)
+    @staticmethod
+    async def _atimed(timings: Dict[str, float], stage: str, coro):
+        stage_started = time.perf_counter()
+        result = await coro
+        timings[stage] = round(time.perf_counter() - stage_started, 3)
+        return result
 
-        # Clean up
-        await self.__cleanup_resources(audio_path, audio_chunk_filepaths)
-        logging.info("Temporary files removed.")
+    @staticmethod
+    async def _arun_concurrently(*coros):
+        """Await coroutines concurrently; if one fails, cancel the others and re-raise."""
+        tasks = [asyncio.ensure_future(coro) for coro in coros]
+        done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        return [task.result() for task in tasks]
 
-        return [Document(text=section["text"], metadata={**section["metadata"], "video_path": video_path}) for section in sections]
+    async def _atranscribe(self, audio_path: str) -> List[Dict]:
+        chunk_dir = tempfile.mkdtemp(prefix="audio_chunks_")
+        try:
+            audio_chunks = await self._asplit_audio(audio_path, chunk_dir)
+            logging.info(f"Audio split into {len(audio_chunks)} chunks.")
+            return await self._atranscribe_and_combine(audio_chunks)
+        finally:
+            await asyncio.to_thread(shutil.rmtree, chunk_dir, True)
 
     async def _aextract_audio(self, video_file_path: str) -> str:
         logging.info("Extracting audio from video...")
-        output_audio_path = tempfile.mktemp(suffix=".wav")
-        video_clip = VideoFileClip(video_file_path)
-        await asyncio.to_thread(video_clip.audio.write_audiofile, output_audio_path, verbose=False, logger=None)
-        video_clip.close()
+        # Only the audio stream is read, video frames are never decoded
+        fd, output_audio_path = tempfile.mkstemp(suffix=".m4a")
+        os.close(fd)
+        output_audio_path = await extract_audio(
+            video_file_path, output_audio_path, bitrate=GlobalConfig.TRANSCRIPTION_AUDIO_BITRATE
+        )
         logging.info("Audio extraction complete.")
         return output_audio_path
 
-    async def _asplit_audio(self, audio_file_path: str, chunk_duration_ms: int = 100 * 1000) -> List[str]:
+    async def _asplit_audio(self, audio_file_path: str, chunk_dir: str, chunk_duration_s: int = GlobalConfig.TRANSCRIPTION_CHUNK_SECONDS) -> List[Dict]:
         logging.info("Splitting audio into chunks...")
-        audio_segment = AudioSegment.from_wav(audio_file_path)
-        chunk_file_paths = []
-        for start_time in range(0, len(audio_segment), chunk_duration_ms):
-            audio_chunk = audio_segment[start_time : start_time + chunk_duration_ms]
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_chunk_file:
-                chunk_file_path = temp_chunk_file.name
-                audio_chunk.export(chunk_file_path, format="wav")
-                chunk_file_paths.append(chunk_file_path)
-        logging.info(f"Audio split into {len(chunk_file_paths)} chunks.")
-        return chunk_file_paths
+        # ffmpeg streams the source and writes compressed segments, ~10x smaller than WAV
+        return await segment_audio(
+            audio_file_path,
+            chunk_dir,
+            segment_seconds=chunk_duration_s,
+            audio_format=GlobalConfig.TRANSCRIPTION_AUDIO_FORMAT,
+            bitrate=GlobalConfig.TRANSCRIPTION_AUDIO_BITRATE,
+        )
 
     async def _atranscribe_audio(self, audio_file_path: str) -> Transcription | str:
         def sync_transcribe(audio_file_path: str) -> Transcription:
@@ -94,43 +136,148 @@ class VideoReader:
 
         return transcription_result
 
-    async def _atranscribe_and_combine(self, audio_chunk_filepaths: List[str]) -> List[Dict]:
+    async def _atranscribe_chunk(self, audio_chunk: Dict, semaphore: asyncio.Semaphore) -> Transcription:
+        async with semaphore:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(GlobalConfig.TRANSCRIPTION_MAX_RETRIES),
+                wait=wait_exponential(multiplier=1, min=2, max=60),
+                reraise=True,
+            ):
+                with attempt:
+                    return await self._atranscribe_audio(audio_chunk["path"])
+
+    async def _atranscribe_and_combine(self, audio_chunks: List[Dict]) -> List[Dict]:
         logging.info("Starting transcription process...")
-        transcript_tasks = [self._atranscribe_audio(chunk) for chunk in audio_chunk_filepaths]
+        # Bound the number of requests in flight to stay under the API rate limits
+        semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+        transcript_tasks = [self._atranscribe_chunk(chunk, semaphore) for chunk in audio_chunks]
         transcript_responses = await asyncio.gather(*transcript_tasks)
 
         full_transcript_with_timestamp = []
-        offset = 0
-        for response in transcript_responses:
-            for segment in response.segments:
-                segment["start"] += offset
-                segment["end"] += offset
-                full_transcript_with_timestamp.append({
+        for audio_chunk, response in zip(audio_chunks, transcript_responses):
+            offset = audio_chunk["start"]
+            segments = [
+                {
                     "text": segment["text"],
-                    "start": self._format_time(segment["start"]),
-                    "end": self._format_time(segment["end"])
-                })
-            offset = self._time_to_seconds(full_transcript_with_timestamp[-1]["end"])
+                    "start": segment["start"] + offset,
+                    "end": segment["end"] + offset,
+                    "words": [],
+                }
+                for segment in response.segments
+            ]
+            # Attach each word to the segment it falls in
+            segment_starts = [segment["start"] for segment in segments]
+            for word in getattr(response, "words", None) or []:
+                word_start = word["start"] + offset
+                position = bisect_right(segment_starts, word_start) - 1
+                if position >= 0:
+                    segments[position]["words"].append({
+                        "word": word["word"],
+                        "start": word_start,
+                        "end": word["end"] + offset,
+                    })
+            full_transcript_with_timestamp.extend(segments)
 
         logging.info("Transcription and combination complete.")
         return full_transcript_with_timestamp
 
     async def _get_summary(self, audio_path: str) -> Dict:
+        if GlobalConfig.SUMMARY_WINDOWED:
+            return await self._aget_windowed_summary(audio_path)
+        return await self._asummarize_audio(audio_path, VIDEO_PROCESSING_PROMPT)
+
+    async def _aget_windowed_summary(self, audio_path: str) -> Dict:
+        """Map-reduce summary: summarize fixed-length windows concurrently, then merge them.
+
+        Section timestamps of each window are shifted to absolute times and a text-only
+        call merges the window summaries into the overall summary.
+        """
+        window_dir = tempfile.mkdtemp(prefix="summary_windows_")
+        try:
+            windows = await segment_audio(
+                audio_path,
+                window_dir,
+                segment_seconds=GlobalConfig.SUMMARY_WINDOW_SECONDS,
+                audio_format=GlobalConfig.TRANSCRIPTION_AUDIO_FORMAT,
+                bitrate=GlobalConfig.TRANSCRIPTION_AUDIO_BITRATE,
+            )
+            if len(windows) == 1:
+                return await self._asummarize_audio(windows[0]["path"], VIDEO_PROCESSING_PROMPT)
+
+            logging.info(f"Summarizing {len(windows)} windows of {GlobalConfig.SUMMARY_WINDOW_SECONDS}s...")
+            semaphore = asyncio.Semaphore(GlobalConfig.SUMMARY_CONCURRENCY)
+            window_summaries = await asyncio.gather(
+                *[self._asummarize_window(window, semaphore) for window in windows]
+            )
+        finally:
+            await asyncio.to_thread(shutil.rmtree, window_dir, True)
+
+        return {
+            "summary": await self._areduce_summaries(windows, window_summaries),
+            "sections": [section for summary in window_summaries for section in summary["sections"]],
+        }
+
+    async def _asummarize_window(self, window: Dict, semaphore: asyncio.Semaphore) -> Dict:
+        async with semaphore:
+            # A failed window is retried on its own, finished windows are kept
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(GlobalConfig.SUMMARY_MAX_RETRIES),
+                wait=wait_exponential(multiplier=1, min=2, max=60),
+                reraise=True,
+            ):
+                with attempt:
+                    summary = await self._asummarize_audio(window["path"], VIDEO_WINDOW_PROCESSING_PROMPT)
+
+        sections = []
+        for section in summary.get("sections", []):
+            section_start = min(window["start"] + parse_timestamp(section["start_time"]), window["end"])
+            section_end = min(window["start"] + parse_timestamp(section["end_time"]), window["end"])
+            sections.append({
+                **section,
+                "start_time": format_timestamp(section_start),
+                "end_time": format_timestamp(section_end),
+            })
+        return {"summary": summary.get("summary", ""), "sections": sections}
+
+    async def _areduce_summaries(self, windows: List[Dict], window_summaries: List[Dict]) -> str:
+        prompt = VIDEO_SUMMARY_REDUCE_PROMPT.format(
+            window_summaries="\n\n".join(
+                f"[{format_timestamp(window['start'])} - {format_timestamp(window['end'])}] {summary['summary']}"
+                for window, summary in zip(windows, window_summaries)
+            )
+        )
+        async for attempt in AsyncRetrying(
+            stop=stop_after_attempt(GlobalConfig.SUMMARY_MAX_RETRIES),
+            wait=wait_exponential(multiplier=1, min=2, max=60),
+            reraise=True,
+        ):
+            with attempt:
+                response = await asyncio.to_thread(self.gemini_model.generate_content, prompt)
+                return self._parse_json_response(response.text)["summary"]
+
+    async def _asummarize_audio(self, audio_path: str, prompt: str) -> Dict:
         logging.info("Starting summary generation...")
         video_file = await asyncio.to_thread(genai.upload_file, path=audio_path)
         logging.info("Audio file uploaded for summarization.")
-        
-        prompt = VIDEO_PROCESSING_PROMPT
 
-        response = await asyncio.to_thread(
-            self.gemini_model.generate_content,
-            [prompt, video_file],
-            request_options={"timeout": 3000}
-        )
+        try:
+            response = await asyncio.to_thread(
+                self.gemini_model.generate_content,
+                [prompt, video_file],
+                request_options={"timeout": 3000}
+            )
+        finally:
+            try:
+                await asyncio.to_thread(genai.delete_file, video_file.name)
+            except Exception as e:
+                logging.warning(f"Failed to delete uploaded file {video_file.name}: {e}")
         logging.info("Summary generation complete.")
-        
+        return self._parse_json_response(response.text)
+
+    @staticmethod
+    def _parse_json_response(text: str) -> Dict:
         # Extract JSON string from the input
-        json_str = re.search(r'```json\n(.*?)```', response.text, re.DOTALL)
+        json_str = re.search(r'```json\n(.*?)```', text, re.DOTALL)
         if json_str:
             json_str = json_str.group(1)
         else:
@@ -138,17 +285,14 @@ class VideoReader:
         logging.info(json_str)
         return json.loads(json_str)
 
-    def _process_sections(self, summary_data: Dict, transcript: List[Dict]) -> List[Dict]:
+    def _process_sections(self, summary_data: Dict, transcript_index: TranscriptIndex) -> List[Dict]:
         logging.info("Processing video sections...")
         processed_sections = []
         for i, section in enumerate(summary_data['sections']):
-            section_start = self._time_to_seconds(section['start_time'])
-            section_end = self._time_to_seconds(section['end_time'])
+            section_start = parse_timestamp(section['start_time'])
+            section_end = parse_timestamp(section['end_time'])
             
-            section_transcript = [
-                entry for entry in transcript
-                if section_start <= self._time_to_seconds(entry['start']) < section_end
-            ]
+            section_transcript = transcript_index.starting_in(section_start, section_end)
             
             processed_section = {
                 "text": section["summary"],
@@ -163,60 +307,6 @@ class VideoReader:
         logging.info("Section processing complete.")
         return processed_sections
 
-    def _cut_video_sections(self, video_path: str, sections: List[Dict]):
-        logging.info("Cutting video into sections...")
-        video = VideoFileClip(video_path)
-        
-        video_name = os.path.splitext(os.path.basename(video_path))[0]
-
-        for i, section in enumerate(sections):
-            
-            logging.info(f"Cutting section {i+1}/{len(sections)}")
-            start_time = self._time_to_seconds(section["metadata"]["start_time"])
-            end_time = self._time_to_seconds(section["metadata"]["end_time"])
-            
-            section_clip = video.subclip(start_time, end_time)
-            output_path = f"{self.output_dir}/{video_name}_section_{i+1}.mp4"
-            section_clip.write_videofile(output_path, verbose=False, logger=None)
-            
-            section["metadata"]["section_path"] = output_path
-
-        video.close()
-        logging.info("Video cutting complete.")
-
-    async def __cleanup_resources(self, audio_path: str, audio_chunk_filepaths: List[str]):
-        logging.info("Cleaning up temporary files...")
-        await aiofiles.os.remove(audio_path)
-        cleanup_tasks = [aiofiles.os.remove(chunk) for chunk in audio_chunk_filepaths]
-        await asyncio.gather(*cleanup_tasks)
-        logging.info("Cleanup complete.")
-
-    @staticmethod
-    def _time_to_seconds(time_str: str) -> float:
-        time_parts = time_str.split(':')
-        if len(time_parts) == 2:  # MM:SS format
-            return int(time_parts[0]) * 60 + float(time_parts[1])
-        elif len(time_parts) == 3:  # HH:MM:SS format
-            return int(time_parts[0]) * 3600 + int(time_parts[1]) * 60 + float(time_parts[2])
-        else:
-            raise ValueError(f"Invalid time format: {time_str}")
-
-    @staticmethod
-    def _format_time(seconds: float) -> str:
-        """Convert seconds to hours, minutes and seconds.
-
-        Args:
-            seconds (float): The time in seconds.
-
-        Returns:
-            str: The time in the format HH:MM:SS.
-        """
-        minutes = int(seconds // 60)
-        hours = int(minutes // 60)
-        remaining_minutes = int(minutes % 60)
-        remaining_seconds = int(seconds % 60)
-        return f"{hours:02}:{remaining_minutes:02}:{remaining_seconds:02}"
-    
 # Usage example:
 async def main():
     video_reader = VideoReader()
@@ -226,7 +316,7 @@ async def main():
         logging.info(f"Summary: {section['text']}")
         logging.info(f"Start Time: {section['metadata']['start_time']}")
         logging.info(f"End Time: {section['metadata']['end_time']}")
-        logging.info(f"Section Video Path: {section['metadata']['section_path']}")
+        logging.info(f"Video Path: {section['metadata']['video_path']}")
         logging.info(f"Transcript: {section['metadata']['transcript'][:100]}...")
         logging.info("---")
 
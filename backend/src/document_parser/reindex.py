@@ -0,0 +1,84 @@
+import logging
+from collections import defaultdict
+from typing import Dict, List
+from llama_index.core.schema import Document
+from src.document_parser.dedup import build_chunk_records, create_deduplicator
+from src.document_parser.embedding_cache import hash_text
+from src.database.manager import DatabaseManager
+
+
+def reindex_document_chunks(
+    db_manager: DatabaseManager,
+    document_id: int,
+    chunks: List[Document],
+    batch_size: int,
+) -> Dict[str, int]:
+    """Bring the stored chunks of a document in line with a new version of it.
+
+    New chunks are matched against the stored ``DocumentChunk`` rows by content hash,
+    preferring a row at the same ``chunk_index``. Matched rows are kept (and
+    re-numbered if they moved), unmatched new chunks are embedded and stored, and
+    stored rows that no longer appear are deleted from SQL and the vector store.
+    """
+    existing = db_manager.get_document_chunks(document_id)
+    rows_by_id = {row.id: row for row in existing}
+    existing_hashes = {row.id: hash_text(row.content) for row in existing}
+    by_index = {row.chunk_index: row for row in existing}
+    new_hashes = [hash_text(chunk.text) for chunk in chunks]
+
+    kept: Dict[int, int] = {}  # existing chunk id -> new chunk index
+    unmatched = []
+
+    # Unchanged chunks that stayed in place
+    for i, text_hash in enumerate(new_hashes):
+        row = by_index.get(i)
+        if row is not None and existing_hashes[row.id] == text_hash:
+            kept[row.id] = i
+        else:
+            unmatched.append(i)
+
+    # Unchanged chunks that moved, e.g. after text was inserted earlier in the document
+    free_rows = defaultdict(list)
+    for row in existing:
+        if row.id not in kept:
+            free_rows[existing_hashes[row.id]].append(row)
+
+    added = []
+    for i in unmatched:
+        candidates = free_rows.get(new_hashes[i])
+        if candidates:
+            kept[candidates.pop(0).id] = i
+        else:
+            added.append(i)
+
+    removed = [row.id for row in existing if row.id not in kept]
+    moved = {
+        chunk_id: index
+        for chunk_id, index in kept.items()
+        if rows_by_id[chunk_id].chunk_index != index
+    }
+
+    logging.info(
+        f"Re-indexing document {document_id}: {len(kept)} unchanged, "
+        f"{len(added)} new or changed, {len(removed)} removed"
+    )
+
+    # Remove stale rows first so old and new chunks never share a chunk_index
+    db_manager.delete_document_chunks(document_id, removed)
+    db_manager.update_chunk_indexes(moved)
+
+    # Seeded after the deletions so new chunks never reference a removed vector
+    deduplicator = create_deduplicator(db_manager, document_id) if added else None
+    for start in range(0, len(added), batch_size):
+        batch = added[start:start + batch_size]
+        db_manager.add_document_chunks(
+            document_id=document_id,
+            chunks=build_chunk_records([chunks[i] for i in batch], batch, deduplicator),
+        )
+
+    return {
+        "total_chunks": len(chunks),
+        "unchanged_chunks": len(kept),
+        "added_chunks": len(added),
+        "removed_chunks": len(removed),
+    }
@@ -0,0 +1,53 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, List, Union
+
+
+def parse_timestamp(value: Union[str, float, int]) -> float:
+    """Parse ``SS``, ``MM:SS`` or ``HH:MM:SS`` (fractional seconds allowed) into seconds."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    parts = value.strip().split(':')
+    if not 1 <= len(parts) <= 3:
+        raise ValueError(f"Invalid time format: {value}")
+    try:
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+    except ValueError:
+        raise ValueError(f"Invalid time format: {value}")
+    return seconds
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as ``HH:MM:SS``."""
+    seconds = int(seconds)
+    return f"{seconds // 3600:02}:{seconds % 3600 // 60:02}:{seconds % 60:02}"
+
+
+class TranscriptIndex:
+    """Transcript segments sorted by start time, with O(log n) time-range lookups.
+
+    Segments are dicts with numeric ``start`` and ``end`` seconds, ``text`` and
+    optionally ``words``. Whisper segments of one recording do not overlap, so the
+    only segment starting before a range that can still overlap it is the last one.
+    """
+
+    def __init__(self, segments: Iterable[Dict]):
+        self.segments: List[Dict] = sorted(segments, key=lambda segment: segment["start"])
+        self.starts: List[float] = [segment["start"] for segment in self.segments]
+
+    def __len__(self) -> int:
+        return len(self.segments)
+
+    def starting_in(self, start: float, end: float) -> List[Dict]:
+        """Segments that start in ``[start, end)``."""
+        return self.segments[bisect_left(self.starts, start):bisect_left(self.starts, end)]
+
+    def between(self, start: float, end: float) -> List[Dict]:
+        """Segments that overlap ``[start, end)``, including one already running at ``start``."""
+        first = max(bisect_right(self.starts, start) - 1, 0)
+        last = bisect_left(self.starts, end)
+        return [segment for segment in self.segments[first:last] if segment["end"] > start]
+
+    def text_between(self, start: float, end: float) -> str:
+        return " ".join(segment["text"].strip() for segment in self.between(start, end))
@@ -2,19 +2,27 @@ import os
 import magic
 import asyncio
 from abc import ABC, abstractmethod
-from typing import Dict, List, Type, Union
-from src.celery import celery
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from celery import chord
+from src.celery import celery, ingest_queue_for, INGEST_QUEUE_OPTIONS
 from datetime import datetime
 from llama_index.core.text_splitter import SentenceSplitter
 from llama_index.core.schema import Document
 import logging
 import src.document_parser.readers as readers
-from src.document_parser.embedding import get_embedding
+from src.document_parser.dedup import build_chunk_records, create_deduplicator
+from src.document_parser.pipeline import StreamingIngestionPipeline, iter_split
+from src.document_parser.reindex import reindex_document_chunks
 from src.database.manager import DatabaseManager
 from src.database.models import DocumentStatus
 from src.dependencies import get_database_manager
+from src.utils.progress import ProgressPublisher
+from src.utils.hls import package_document_hls
 from src.constants import GlobalConfig
 
+# chunk_index offset between fan-out parts; finalize_document renumbers them sequentially
+FANOUT_CHUNK_INDEX_STRIDE = 1_000_000
+
 class FileProcessor(ABC):
     @abstractmethod
     def process(self, file_path: str) -> Dict:
@@ -24,8 +32,22 @@ class TextFileProcessor(FileProcessor):
     def __init__(self, reader_class):
         self.reader_class = reader_class
 
+    def _create_reader(self, return_full_document: bool, **kwargs):
+        try:
+            return self.reader_class(return_full_document=return_full_document, **kwargs)
+        except TypeError:
+            # Most llama_index readers take no constructor arguments
+            return self.reader_class()
+
+    def count_pages(self, file_path: str) -> Optional[int]:
+        """Number of pages for page-addressable formats, None for everything else."""
+        reader = self._create_reader(return_full_document=False)
+        if not hasattr(reader, "count_pages"):
+            return None
+        return reader.count_pages(file_path)
+
     def process(self, file_path: str) -> Dict:
-        reader = self.reader_class(return_full_document=True)
+        reader = self._create_reader(return_full_document=True)
         docs: List[Document] = reader.load_data(file_path)
         
         splitter = SentenceSplitter()
@@ -40,6 +62,19 @@ class TextFileProcessor(FileProcessor):
             "documents": chunks,
         }
 
+    def iter_chunks(self, file_path: str, page_range: Optional[Tuple[int, int]] = None) -> Iterable[Document]:
+        """Lazily read and split the file, yielding chunks as pages are parsed."""
+        if page_range is not None:
+            reader = self._create_reader(return_full_document=False, page_range=page_range)
+        else:
+            reader = self._create_reader(return_full_document=False)
+        try:
+            docs = reader.lazy_load_data(file_path)
+        except NotImplementedError:
+            # Reader has no lazy mode; fall back to loading it in one go
+            docs = reader.load_data(file_path)
+        return iter_split(docs)
+
 class VideoFileProcessor(FileProcessor):
     def __init__(self, reader_class):
         self.reader_class = reader_class
@@ -49,18 +84,19 @@ class VideoFileProcessor(FileProcessor):
         docs: List[Document] = await reader.load_data(file_path)
         
         return {
-            "file_type": "Video",
+            "file_type": self.reader_class.__name__.replace('Reader', ''),
             "file_path": file_path,
             "processed_at": datetime.now().isoformat(),
             "chunks": len(docs),
             "documents": docs,
+            "transcript": reader.transcript,
         }
 
     def process(self, file_path: str) -> Dict:
         return asyncio.run(self.async_process(file_path))
 
 def create_processor_class(reader_class):
-    if reader_class.__name__ == 'VideoReader':
+    if reader_class.__name__ in ('VideoReader', 'AudioReader'):
         return VideoFileProcessor(reader_class)
     else:
         class DynamicProcessor(TextFileProcessor):
@@ -69,7 +105,7 @@ def create_processor_class(reader_class):
         return DynamicProcessor()
 
 class FileProcessorFactory:
-    _processors: Dict[str, Type[FileProcessor]] = {}
+    _processors: Dict[str, FileProcessor] = {}
     _file_extensions: Dict[str, str] = {
         '.docx': 'Docx',
         '.hwp': 'HWP',
@@ -87,32 +123,39 @@ class FileProcessorFactory:
         '.xml': 'XML',
         '.rtf': 'RTF',
         '.mp4': 'Video',
+        '.mp3': 'Audio',
+        '.m4a': 'Audio',
+        '.wav': 'Audio',
+        '.ogg': 'Audio',
     }
 
     @classmethod
-    def initialize(cls):
-        for ext, reader_name in cls._file_extensions.items():
+    def _resolve_processor(cls, file_extension: str) -> Optional[FileProcessor]:
+        """Processor for ``file_extension``, importing its reader on first use."""
+        if file_extension not in cls._processors:
+            reader_name = cls._file_extensions.get(file_extension)
+            if reader_name is None:
+                return None
+            # Resolving a reader imports its module, see src.document_parser.readers
             reader_class = getattr(readers, f"{reader_name}Reader", None)
-            if reader_class:
-                processor_class = create_processor_class(reader_class)
-                cls._processors[ext] = processor_class
+            if reader_class is None:
+                return None
+            cls._processors[file_extension] = create_processor_class(reader_class)
+        return cls._processors[file_extension]
 
     @classmethod
     def get_processor(cls, file_path: str) -> Union[FileProcessor, VideoFileProcessor]:
-        if not cls._processors:
-            cls.initialize()
-
         file_extension = os.path.splitext(file_path)[1].lower()
         
-        if file_extension in cls._processors:
-            return cls._processors[file_extension]
+        processor = cls._resolve_processor(file_extension)
+        if processor is not None:
+            return processor
         
         # If extension is not recognized, use MIME type detection
         mime_type = cls.detect_mime_type(file_path)
         file_type = cls.mime_to_file_type(mime_type)
         
-        processor_class = cls._processors.get(file_type, create_processor_class(readers.FlatReader))
-        return processor_class()
+        return cls._resolve_processor(file_type) or cls._resolve_processor('.txt')
 
     @classmethod
     def register_processor(cls, file_extension: str, reader_class):
@@ -142,39 +185,209 @@ class FileProcessorFactory:
             'text/csv': '.csv',
             'video/mp4': '.mp4',
             'audio/mpeg': '.mp3',
+            'audio/mp4': '.m4a',
+            'audio/x-m4a': '.m4a',
+            'audio/wav': '.wav',
+            'audio/x-wav': '.wav',
+            'audio/ogg': '.ogg',
             'application/xml': '.xml',
             'text/rtf': '.rtf',
             # Add more mappings as needed
         }
         return mime_to_type.get(mime_type, '.txt')  # Default to .txt for unstructured
 
+def _ingest_chunks(db_manager: DatabaseManager, document_id: int, chunks: List[Document], progress: ProgressPublisher) -> int:
+    total_chunks = len(chunks)
+    batch_size = GlobalConfig.CHUNK_WRITE_BATCH_SIZE
+    deduplicator = create_deduplicator(db_manager, document_id)
+    for start in range(0, total_chunks, batch_size):
+        batch = chunks[start:start + batch_size]
+        logging.info(f"Processing chunks {start+1}-{start+len(batch)} of {total_chunks}")
+        db_manager.add_document_chunks(
+            document_id=document_id,
+            chunks=build_chunk_records(batch, list(range(start, start + len(batch))), deduplicator),
+        )
+        progress.progress(start + len(batch), total_chunks)
+    return total_chunks
+
+def _store_transcript(db_manager: DatabaseManager, document_id: int, result: Dict):
+    """Persist the timestamped transcript of media documents for time-range queries."""
+    transcript = result.get('transcript')
+    if transcript:
+        count = db_manager.replace_transcript_segments(document_id, transcript)
+        logging.info(f"Stored {count} transcript segments for document {document_id}")
+
+def _schedule_hls_packaging(processor: FileProcessor, file_path: str, document_id: int, result: Dict):
+    """Queue HLS packaging of an ingested video, with its sections for segment mapping."""
+    if not GlobalConfig.HLS_ENABLED or not isinstance(processor, VideoFileProcessor):
+        return
+    if processor.reader_class.__name__ != 'VideoReader':
+        return
+    sections = [
+        {"start_time": doc.metadata["start_time"], "end_time": doc.metadata["end_time"]}
+        for doc in result.get('documents', [])
+        if "start_time" in doc.metadata and "end_time" in doc.metadata
+    ]
+    package_video_hls.apply_async(
+        args=(document_id, file_path, sections),
+        queue=GlobalConfig.INGEST_MEDIA_QUEUE,
+    )
+
 @celery.task(bind=True)
-def process_document(self, file_path: str, document_id: int, db_manager: DatabaseManager = get_database_manager()):
+def process_document(self, file_path: str, document_id: int, streaming: bool = GlobalConfig.STREAMING_INGESTION, db_manager: DatabaseManager = get_database_manager()):
+    document = db_manager.get_document(document_id)
+    if not document:
+        raise ValueError("Document not found")
+    progress = ProgressPublisher(document.knowledge_base_id, document_id, task=self)
+    
     try:
         db_manager.update_document_status(document_id, DocumentStatus.PROCESSING)
+        progress.status(DocumentStatus.PROCESSING.value)
         logging.info(f"Processing document {document_id} at {file_path}")
         processor = FileProcessorFactory.get_processor(file_path)
-        result = processor.process(file_path)
         
-        chunks : List[Document] = result.get('documents', [])
-        total_chunks = len(chunks)
+        already_indexed = db_manager.count_document_chunks(document_id) > 0
+        num_pages = None
+        if not already_indexed and isinstance(processor, TextFileProcessor):
+            num_pages = processor.count_pages(file_path)
         
-        for i, chunk in enumerate(chunks):
-            logging.info(f"Processing chunk {i+1} of {total_chunks}")
-            db_manager.add_document_chunk(
+        if already_indexed:
+            # Already indexed: only embed and store the chunks that changed. Text is
+            # re-chunked the way it was ingested so unchanged chunks keep matching.
+            result = None
+            if isinstance(processor, TextFileProcessor):
+                chunks = list(processor.iter_chunks(file_path))
+            else:
+                result = processor.process(file_path)
+                _store_transcript(db_manager, document_id, result)
+                chunks = result.get('documents', [])
+            stats = reindex_document_chunks(
+                db_manager,
+                document_id,
+                chunks,
+                batch_size=GlobalConfig.CHUNK_WRITE_BATCH_SIZE,
+            )
+            if result is not None:
+                _schedule_hls_packaging(processor, file_path, document_id, result)
+            response = {"status": "success", "message": "Document re-indexed successfully", **stats}
+        elif num_pages is not None and num_pages >= GlobalConfig.FANOUT_MIN_PAGES:
+            return _fan_out_document(file_path, document_id, num_pages, db_manager)
+        elif streaming and isinstance(processor, TextFileProcessor):
+            pipeline = StreamingIngestionPipeline(
+                db_manager=db_manager,
                 document_id=document_id,
-                chunk_index=i,
-                content=chunk.text,
-                vector=get_embedding(chunk.text),
-                metadata=chunk.metadata
+                batch_size=GlobalConfig.MODEL.EMBEDDING_BATCH_SIZE,
+                queue_size=GlobalConfig.STREAMING_QUEUE_SIZE,
+                on_progress=progress.progress,
+                deduplicator=create_deduplicator(db_manager, document_id),
             )
-            
-            self.update_state(state='PROGRESS',
-                              meta={'current': i + 1, 'total': total_chunks})
+            total_chunks = pipeline.run(processor.iter_chunks(file_path))
+            response = {"status": "success", "message": "Document processed successfully", "total_chunks": total_chunks}
+        else:
+            result = processor.process(file_path)
+            _store_transcript(db_manager, document_id, result)
+            total_chunks = _ingest_chunks(db_manager, document_id, result.get('documents', []), progress)
+            _schedule_hls_packaging(processor, file_path, document_id, result)
+            response = {"status": "success", "message": "Document processed successfully", "total_chunks": total_chunks}
         
         db_manager.update_document_status(document_id, DocumentStatus.PROCESSED)
+        progress.status(DocumentStatus.PROCESSED.value, total_chunks=response.get("total_chunks"))
         
-        return {"status": "success", "message": "Document processed successfully", "total_chunks": total_chunks}
+        return response
     except Exception as e:
         db_manager.update_document_status(document_id, DocumentStatus.FAILED)
-        raise e
\ No newline at end of file
+        progress.status(DocumentStatus.FAILED.value, error=str(e))
+        raise e
+
+
+def _fan_out_document(file_path: str, document_id: int, num_pages: int, db_manager: DatabaseManager) -> Dict:
+    """Split a large document into page ranges processed in parallel, merged by a chord callback."""
+    pages_per_part = GlobalConfig.FANOUT_PAGES_PER_TASK
+    page_ranges = [
+        (start, min(start + pages_per_part, num_pages))
+        for start in range(0, num_pages, pages_per_part)
+    ]
+    logging.info(f"Fanning out document {document_id} ({num_pages} pages) into {len(page_ranges)} parts")
+    
+    queue = ingest_queue_for(file_path)
+    parts = [
+        process_document_range.s(file_path, document_id, part, start, end).set(
+            queue=queue, **INGEST_QUEUE_OPTIONS[queue]
+        )
+        for part, (start, end) in enumerate(page_ranges)
+    ]
+    callback = finalize_document.s(document_id).set(queue=queue).on_error(
+        fail_document.s(document_id).set(queue=queue)
+    )
+    result = chord(parts)(callback)
+    
+    # The status endpoint follows the callback, which completes once every part is merged
+    db_manager.set_document_task_id(document_id, result.id)
+    return {"status": "success", "message": "Document split into parallel parts", "parts": len(page_ranges), "finalize_task_id": result.id}
+
+@celery.task(bind=True)
+def process_document_range(self, file_path: str, document_id: int, part: int, start_page: int, end_page: int, db_manager: DatabaseManager = get_database_manager()):
+    """Ingest pages ``[start_page, end_page)`` of a document as part ``part`` of a fan-out.
+
+    A part redelivered after a worker crash first drops whatever its previous run
+    stored, so its chunks are never written twice. Near-duplicates are only collapsed
+    within a part, as each part seeds its own deduplicator.
+    """
+    index_offset = part * FANOUT_CHUNK_INDEX_STRIDE
+    stale_chunks = db_manager.delete_document_chunk_range(document_id, index_offset, index_offset + FANOUT_CHUNK_INDEX_STRIDE)
+    if stale_chunks:
+        logging.info(f"Dropped {stale_chunks} chunks from an earlier run of part {part} of document {document_id}")
+
+    processor = FileProcessorFactory.get_processor(file_path)
+    pipeline = StreamingIngestionPipeline(
+        db_manager=db_manager,
+        document_id=document_id,
+        batch_size=GlobalConfig.MODEL.EMBEDDING_BATCH_SIZE,
+        queue_size=GlobalConfig.STREAMING_QUEUE_SIZE,
+        deduplicator=create_deduplicator(db_manager, document_id),
+    )
+    # Parts use disjoint index ranges so finalize_document can restore the global order
+    total_chunks = pipeline.run(
+        processor.iter_chunks(file_path, page_range=(start_page, end_page)),
+        index_offset=index_offset,
+    )
+    return {"part": part, "total_chunks": total_chunks}
+
+@celery.task
+def finalize_document(results: List[Dict], document_id: int, db_manager: DatabaseManager = get_database_manager()):
+    """Chord callback: renumber chunks of all parts into one global order and mark the document processed."""
+    total_chunks = db_manager.renumber_document_chunks(document_id)
+    db_manager.update_document_status(document_id, DocumentStatus.PROCESSED)
+    
+    document = db_manager.get_document(document_id)
+    ProgressPublisher(document.knowledge_base_id, document_id).status(
+        DocumentStatus.PROCESSED.value, total_chunks=total_chunks
+    )
+    return {"status": "success", "message": "Document processed successfully", "total_chunks": total_chunks, "parts": len(results)}
+
+@celery.task
+def fail_document(request, exc, traceback, document_id: int, db_manager: DatabaseManager = get_database_manager()):
+    """Chord error callback: mark the document failed when any part fails."""
+    logging.error(f"Processing document {document_id} failed: {exc}")
+    db_manager.update_document_status(document_id, DocumentStatus.FAILED)
+    
+    document = db_manager.get_document(document_id)
+    ProgressPublisher(document.knowledge_base_id, document_id).status(
+        DocumentStatus.FAILED.value, error=str(exc)
+    )
+
+
+@celery.task
+def package_video_hls(document_id: int, file_path: str, sections: List[Dict]):
+    """Post-ingestion stage: package a video as HLS so playback can start at any section."""
+    return asyncio.run(package_document_hls(document_id, file_path, sections))
+
+
+def enqueue_process_document(file_path: str, document_id: int):
+    """Dispatch ``process_document`` to the ingestion queue matching the file type."""
+    queue = ingest_queue_for(file_path)
+    return process_document.apply_async(
+        args=(file_path, document_id),
+        queue=queue,
+        **INGEST_QUEUE_OPTIONS[queue],
+    )
@@ -1,21 +1,30 @@
 from api.utils.websocket_manager import ws_manager, MediaType, EndStatus, MessageType, Message
 from llama_index.core.tools import FunctionTool
+from src.document_parser.transcript import parse_timestamp
+from src.utils.clip_cache import get_clip_cache
+from typing import Optional
 import asyncio
 import os
 
 def load_display_tool(conversation_id):
 
-    def display_video(video_path: str):
+    def display_video(video_path: str, start_time: Optional[str] = None, end_time: Optional[str] = None):
         """
-        Display the video at the given path.
+        Display the video at the given path, or only the section between start_time and end_time.
 
         Parameters:
         - conversation_id (int): The ID of the conversation.
         - video_path (str): The path to the video file.
+        - start_time (str, optional): Start of the section to show, formatted as HH:MM:SS.
+        - end_time (str, optional): End of the section to show, formatted as HH:MM:SS.
 
         Returns:
         - dict: The response message.
         """
+        if start_time and end_time:
+            video_path = os.path.relpath(get_clip_cache().get_clip_sync(
+                video_path, parse_timestamp(start_time), parse_timestamp(end_time)
+            ))
         message = Message(
             message_type = MessageType.MESSAGE,
             media_type = MediaType.VIDEO,
@@ -1,8 +1,4 @@
-import qdrant_client
-from llama_index.core import VectorStoreIndex
-from llama_index.vector_stores.qdrant import QdrantVectorStore
-from llama_index.core import StorageContext
-from llama_index.core.schema import MetadataMode
+from llama_index.core.schema import MetadataMode, TextNode
 from llama_index.embeddings.openai import OpenAIEmbedding
 from llama_index.core.tools import FunctionTool
 from src.constants import GlobalConfig 
@@ -56,18 +52,17 @@ def load_knowledge_base_search_tool(config: dict):
     else:
         raise NotImplementedError()   
     
-    if GlobalConfig.MODEL.VECTOR_STORE == "qdrant":
-        client = qdrant_client.QdrantClient(url=GlobalConfig.QDRANT_DB_URL)
-        vector_store = QdrantVectorStore(client=client, collection_name=config.get("collection_name", "kb_1"))
-    else:
+    collection_name = config.get("collection_name", "kb_1")
+    if GlobalConfig.MODEL.VECTOR_STORE not in ("flat", "ivf", "qdrant"):
         raise NotImplementedError()
-    
-    storage_context = StorageContext.from_defaults(vector_store=vector_store)
-    index = VectorStoreIndex.from_vector_store(vector_store, storage_context=storage_context, embed_model=embed_model)
-    start_id = 0
-    
+    from src.dependencies import get_cache_db_manager
+    return _load_vector_db_search_tool(embed_model, get_cache_db_manager().vector_db, collection_name)
+
+def _load_vector_db_search_tool(embed_model, vector_db, collection_name: str):
+    # Query through the shared vector DB rather than a llama_index vector store: the local
+    # stores have no integration and QdrantVectorStore drops the collection's search params
+
     def retrieve_knowledge_base(query_str: str, num_sources: int = 5):
-        
         """
         Useful for answering questions about the knowledge base.
 
@@ -78,27 +73,29 @@ def load_knowledge_base_search_tool(config: dict):
         Returns:
             RetrievalResponses: A list of retrieved sources, each containing the source link and content.
         """
-        retriever = index.as_retriever(
-            similarity_top_k=num_sources,
+        hits = vector_db.search_vectors(
+            collection_name=collection_name,
+            query_vector=embed_model.get_query_embedding(query_str),
+            limit=num_sources,
         )
-        
-        
-        retriever_response = retriever.retrieve(query_str)
-        print("Retrieval Content: ", [n.node.get_content(metadata_mode=MetadataMode.LLM) for n in retriever_response])
-        print("Retrieval Metadata: ", [n.node.metadata for n in retriever_response])
-        try: 
-            url = retriever_response[0].node.metadata["metadata"]["file_name"]
-        except:
-            url = ""
+        # Rebuild nodes the way QdrantVectorStore reads these payloads, so the LLM still
+        # sees the chunk metadata (file and video paths, timestamps) next to the text
+        nodes = [
+            TextNode(
+                text=hit.payload["text"],
+                metadata={key: value for key, value in hit.payload.items() if key != "text"},
+            )
+            for hit in hits
+        ]
         return RetrievalResponses([
             SingleSourceNode(
-                index=start_id + i,
-                text=n.node.get_content(metadata_mode=MetadataMode.LLM), 
-                url=url,
+                index=i,
+                text=node.get_content(metadata_mode=MetadataMode.LLM),
+                url=(node.metadata.get("metadata") or {}).get("file_name", ""),
                 chunk_start=0,
                 chunk_end=0
             )
-            for i, n in enumerate(retriever_response)
+            for i, node in enumerate(nodes)
         ])
-    
-    return FunctionTool.from_defaults(retrieve_knowledge_base)
\ No newline at end of file
+
+    return FunctionTool.from_defaults(retrieve_knowledge_base)
@@ -1,5 +1,7 @@
 from .kb_search_tool import load_knowledge_base_search_tool
 from .display_tool import load_display_tool
+from .transcript_tool import load_transcript_tool
+from src.dependencies import get_cache_db_manager
 from llama_index.core.tools import FunctionTool
 from typing import List
 
@@ -9,6 +11,8 @@ class ToolManager:
             load_knowledge_base_search_tool(config),
             # load_display_tool(config["conversation_id"])
         ]
+        if "knowledge_base_id" in config:
+            self.tools.append(load_transcript_tool(config, get_cache_db_manager()))
 
     def add_tool(self, tool):
         self.tools.append(tool)
@@ -0,0 +1,41 @@
+import os
+from llama_index.core.tools import FunctionTool
+from src.database.manager import DatabaseManager
+from src.document_parser.transcript import format_timestamp, parse_timestamp
+
+
+def load_transcript_tool(config: dict, db_manager: DatabaseManager):
+    knowledge_base_id = config["knowledge_base_id"]
+
+    def get_video_transcript(video: str, start_time: str, end_time: str):
+        """
+        Get what is said in a video of the knowledge base between two timestamps.
+
+        Args:
+            video (str): The video file name or path, as shown in the retrieved sources.
+            start_time (str): Start of the range, formatted as HH:MM:SS or MM:SS.
+            end_time (str): End of the range, formatted as HH:MM:SS or MM:SS.
+
+        Returns:
+            str: The timestamped transcript lines in the range.
+        """
+        document = (
+            db_manager.get_document_by_path(knowledge_base_id, video)
+            or db_manager.get_document_by_name(knowledge_base_id, os.path.basename(video))
+        )
+        if not document:
+            return f"Video '{video}' not found in the knowledge base."
+        try:
+            start, end = parse_timestamp(start_time), parse_timestamp(end_time)
+        except ValueError as e:
+            return str(e)
+
+        segments = db_manager.get_transcript_segments(document.id, start, end)
+        if not segments:
+            return f"No transcript found for '{video}' between {start_time} and {end_time}."
+        return "\n".join(
+            f"[{format_timestamp(segment.start_time)} - {format_timestamp(segment.end_time)}] {segment.text.strip()}"
+            for segment in segments
+        )
+
+    return FunctionTool.from_defaults(get_video_transcript)
@@ -0,0 +1,97 @@
+import os
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, List
+from src.constants import GlobalConfig
+from src.utils.ffmpeg import cut_clip_sync
+
+
+class ClipCache:
+    """Bounded on-disk cache of media section clips, cut on first request.
+
+    Clips are keyed by source file (path, size and mtime, so a replaced upload never
+    serves stale clips) and time range. A clip's mtime is bumped on every hit and the
+    least recently used clips are evicted once the directory exceeds ``max_size_bytes``.
+
+    Clips are cut under thread locks rather than asyncio ones, so the API (``get_clip``)
+    and tools running in worker threads (``get_clip_sync``) share the cache safely.
+    """
+
+    def __init__(self, cache_dir: str, max_size_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        # Per-clip lock and the number of callers holding or waiting for it
+        self._locks: Dict[str, List] = {}
+        self._locks_guard = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def clip_path(self, source_path: str, start: float, end: float) -> str:
+        stat = os.stat(source_path)
+        key = f"{os.path.abspath(source_path)}:{stat.st_size}:{stat.st_mtime_ns}:{start:.3f}:{end:.3f}"
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()[:32]
+        extension = os.path.splitext(source_path)[1].lower()
+        return os.path.join(self.cache_dir, f"{digest}{extension}")
+
+    async def get_clip(self, source_path: str, start: float, end: float) -> str:
+        """Path of the ``[start, end)`` clip of ``source_path``, cutting it if not cached."""
+        return await asyncio.to_thread(self.get_clip_sync, source_path, start, end)
+
+    def get_clip_sync(self, source_path: str, start: float, end: float) -> str:
+        """Blocking ``get_clip``, for callers outside the event loop."""
+        if end <= start:
+            raise ValueError(f"Invalid clip range: {start} - {end}")
+        path = self.clip_path(source_path, start, end)
+        # Concurrent requests for the same clip wait for a single cut
+        with self._locks_guard:
+            entry = self._locks.setdefault(path, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                if os.path.exists(path):
+                    os.utime(path)
+                    return path
+
+                partial_path = f"{path}.{uuid.uuid4().hex}.part{os.path.splitext(path)[1]}"
+                try:
+                    cut_clip_sync(source_path, partial_path, start, end)
+                    os.replace(partial_path, path)
+                finally:
+                    if os.path.exists(partial_path):
+                        os.remove(partial_path)
+                logging.info(f"Cut clip {start:.1f}-{end:.1f}s of {source_path}")
+        finally:
+            with self._locks_guard:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    self._locks.pop(path, None)
+
+        self._evict(keep=path)
+        return path
+
+    def _evict(self, keep: str):
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_file() and ".part" not in entry.name:
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_size_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except FileNotFoundError:
+                pass
+
+
+@lru_cache()
+def get_clip_cache() -> ClipCache:
+    return ClipCache(GlobalConfig.CLIP_CACHE_DIR, GlobalConfig.CLIP_CACHE_MAX_SIZE_MB * 1024 * 1024)
@@ -0,0 +1,179 @@
+import os
+import csv
+import shutil
+import asyncio
+import subprocess
+import logging
+from functools import lru_cache
+from typing import Dict, List
+
+
+@lru_cache()
+def get_ffmpeg_exe() -> str:
+    """Path to the ffmpeg binary, preferring the one bundled with imageio-ffmpeg (a moviepy dependency)."""
+    try:
+        import imageio_ffmpeg
+
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except (ImportError, RuntimeError):
+        ffmpeg = shutil.which("ffmpeg")
+        if ffmpeg is None:
+            raise RuntimeError("ffmpeg is required for media processing: install ffmpeg or `pip install imageio-ffmpeg`")
+        return ffmpeg
+
+
+async def run_ffmpeg(*args: str) -> None:
+    """Run ffmpeg with ``args`` and raise ``RuntimeError`` with its stderr on failure."""
+    process = await asyncio.create_subprocess_exec(
+        get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y", *args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    _, stderr = await process.communicate()
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed ({process.returncode}): {stderr.decode(errors='replace').strip()}")
+
+
+def run_ffmpeg_sync(*args: str) -> None:
+    """Blocking ``run_ffmpeg`` for callers without an event loop."""
+    process = subprocess.run(
+        [get_ffmpeg_exe(), "-hide_banner", "-loglevel", "error", "-y", *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed ({process.returncode}): {process.stderr.decode(errors='replace').strip()}")
+
+
+async def segment_audio(
+    input_path: str,
+    output_dir: str,
+    segment_seconds: int,
+    audio_format: str = "mp3",
+    bitrate: str = "32k",
+    copy: bool = False,
+) -> List[Dict]:
+    """Cut the audio of ``input_path`` into consecutive segments with ffmpeg's segment muxer.
+
+    The input is streamed, never fully decoded into memory. Segments are encoded as
+    mono 16 kHz ``audio_format`` at ``bitrate`` (enough for speech), or stream-copied
+    when ``copy`` is set and the source codec already matches ``audio_format``.
+
+    Returns:
+        List[Dict]: ``{"path", "start", "end"}`` per segment, times in seconds.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    segment_list = os.path.join(output_dir, "segments.csv")
+    codec_args = ["-c:a", "copy"] if copy else ["-ac", "1", "-ar", "16000", "-b:a", bitrate]
+    await run_ffmpeg(
+        "-i", input_path,
+        "-vn",
+        *codec_args,
+        "-f", "segment",
+        "-segment_time", str(segment_seconds),
+        "-segment_list", segment_list,
+        "-segment_list_type", "csv",
+        "-reset_timestamps", "1",
+        os.path.join(output_dir, f"segment_%05d.{audio_format}"),
+    )
+
+    segments = []
+    with open(segment_list, newline="") as f:
+        for file_name, start, end in csv.reader(f):
+            segments.append({
+                "path": os.path.join(output_dir, file_name),
+                "start": float(start),
+                "end": float(end),
+            })
+    logging.info(f"Audio split into {len(segments)} {audio_format} segments.")
+    return segments
+
+
+async def extract_audio(input_path: str, output_path: str, bitrate: str = "32k") -> str:
+    """Extract the audio track of ``input_path`` without decoding video frames.
+
+    The track is stream-copied into ``output_path`` (an ``.m4a`` container holds the
+    AAC audio of typical mp4 files). If the codec does not fit the container, the
+    audio alone is re-encoded to mono mp3 next to it instead.
+
+    Returns:
+        str: Path of the extracted audio file.
+    """
+    try:
+        await run_ffmpeg("-i", input_path, "-vn", "-map", "0:a:0", "-c:a", "copy", output_path)
+        return output_path
+    except RuntimeError as e:
+        logging.info(f"Audio stream copy failed, re-encoding instead: {e}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+
+    output_path = f"{os.path.splitext(output_path)[0]}.mp3"
+    await run_ffmpeg("-i", input_path, "-vn", "-map", "0:a:0", "-ac", "1", "-b:a", bitrate, output_path)
+    return output_path
+
+
+def _cut_clip_args(input_path: str, output_path: str, start: float, end: float) -> List[str]:
+    return [
+        "-ss", f"{start:.3f}",
+        "-i", input_path,
+        "-t", f"{max(end - start, 0):.3f}",
+        "-map", "0",
+        "-c", "copy",
+        "-avoid_negative_ts", "make_zero",
+        "-movflags", "+faststart",
+        output_path,
+    ]
+
+
+async def cut_clip(input_path: str, output_path: str, start: float, end: float) -> str:
+    """Cut ``[start, end)`` seconds of ``input_path`` into ``output_path`` without re-encoding.
+
+    Streams are copied, so the clip starts on the keyframe at or before ``start``.
+    """
+    await run_ffmpeg(*_cut_clip_args(input_path, output_path, start, end))
+    return output_path
+
+
+def cut_clip_sync(input_path: str, output_path: str, start: float, end: float) -> str:
+    """Blocking ``cut_clip``."""
+    run_ffmpeg_sync(*_cut_clip_args(input_path, output_path, start, end))
+    return output_path
+
+
+async def package_hls(input_path: str, output_dir: str, segment_seconds: int) -> List[Dict]:
+    """Package ``input_path`` as a single-rendition VOD HLS stream without re-encoding.
+
+    Writes ``index.m3u8`` and ``segment_NNNNN.ts`` files into ``output_dir``. Streams
+    are copied, so segments are cut on keyframes and may be longer than requested.
+
+    Returns:
+        List[Dict]: ``{"file", "start", "end"}`` per segment, times in seconds.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    playlist = os.path.join(output_dir, "index.m3u8")
+    await run_ffmpeg(
+        "-i", input_path,
+        "-map", "0:v:0?",
+        "-map", "0:a:0?",
+        "-c", "copy",
+        "-f", "hls",
+        "-hls_time", str(segment_seconds),
+        "-hls_playlist_type", "vod",
+        "-hls_segment_filename", os.path.join(output_dir, "segment_%05d.ts"),
+        playlist,
+    )
+
+    segments = []
+    start = 0.0
+    duration = None
+    with open(playlist) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#EXTINF:"):
+                duration = float(line[len("#EXTINF:"):].split(",")[0])
+            elif line and not line.startswith("#") and duration is not None:
+                segments.append({"file": line, "start": start, "end": start + duration})
+                start += duration
+                duration = None
+    logging.info(f"Packaged {input_path} into {len(segments)} HLS segments.")
+    return segments
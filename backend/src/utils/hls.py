@@ -0,0 +1,62 @@
+import os
+import json
+import shutil
+import asyncio
+import logging
+from bisect import bisect_right
+from typing import Dict, List
+from src.constants import GlobalConfig
+from src.document_parser.transcript import parse_timestamp
+from src.utils.ffmpeg import package_hls
+
+PLAYLIST_FILE = "index.m3u8"
+SECTIONS_FILE = "sections.json"
+
+
+def hls_dir(document_id: int) -> str:
+    return os.path.join(GlobalConfig.HLS_DIR, str(document_id))
+
+
+def map_sections_to_segments(sections: List[Dict], segments: List[Dict]) -> List[Dict]:
+    """Attach the HLS segment containing each section's start, so players can seek there directly."""
+    segment_starts = [segment["start"] for segment in segments]
+    mapped = []
+    for i, section in enumerate(sections):
+        start = parse_timestamp(section["start_time"])
+        end = parse_timestamp(section["end_time"])
+        segment_index = max(bisect_right(segment_starts, start) - 1, 0)
+        mapped.append({
+            "index": i,
+            "start_time": section["start_time"],
+            "end_time": section["end_time"],
+            "start": start,
+            "end": end,
+            "segment_index": segment_index,
+            "segment_file": segments[segment_index]["file"] if segments else None,
+            "segment_start": segments[segment_index]["start"] if segments else 0.0,
+        })
+    return mapped
+
+
+async def package_document_hls(document_id: int, file_path: str, sections: List[Dict]) -> Dict:
+    """Package a video as HLS into ``hls_dir(document_id)`` along with its ``sections.json``.
+
+    The stream is built in a temporary directory and swapped in once complete, so a
+    re-packaged document never serves a half-written playlist.
+    """
+    output_dir = hls_dir(document_id)
+    build_dir = f"{output_dir}.building"
+    await asyncio.to_thread(shutil.rmtree, build_dir, True)
+    try:
+        segments = await package_hls(file_path, build_dir, GlobalConfig.HLS_SEGMENT_SECONDS)
+        mapped_sections = map_sections_to_segments(sections, segments)
+        with open(os.path.join(build_dir, SECTIONS_FILE), "w") as f:
+            json.dump({"playlist": PLAYLIST_FILE, "sections": mapped_sections}, f)
+
+        await asyncio.to_thread(shutil.rmtree, output_dir, True)
+        os.replace(build_dir, output_dir)
+    finally:
+        await asyncio.to_thread(shutil.rmtree, build_dir, True)
+
+    logging.info(f"HLS stream for document {document_id} ready with {len(segments)} segments")
+    return {"segments": len(segments), "sections": len(mapped_sections)}
@@ -0,0 +1,81 @@
+import json
+import time
+import logging
+from functools import lru_cache
+from typing import Any, Dict, Optional
+import redis
+from src.constants import GlobalConfig
+
+
+def progress_channel(knowledge_base_id: int) -> str:
+    return f"kb_progress:{knowledge_base_id}"
+
+
+@lru_cache()
+def get_redis_client() -> redis.Redis:
+    return redis.Redis.from_url(GlobalConfig.PROGRESS_REDIS_URL)
+
+
+class ProgressPublisher:
+    """Publish throttled ingestion progress for a document to its knowledge base channel.
+
+    Progress events are sent at most every ``every_n_chunks`` chunks or every
+    ``interval_ms`` milliseconds, whichever comes first. When a Celery ``task`` is
+    given, its ``PROGRESS`` state is updated at the same throttled rate so the
+    polling status endpoint keeps working.
+    """
+
+    def __init__(
+        self,
+        knowledge_base_id: int,
+        document_id: int,
+        task=None,
+        task_id: Optional[str] = None,
+        every_n_chunks: int = GlobalConfig.PROGRESS_EVERY_N_CHUNKS,
+        interval_ms: int = GlobalConfig.PROGRESS_INTERVAL_MS,
+    ):
+        self.channel = progress_channel(knowledge_base_id)
+        self.document_id = document_id
+        self.task = task
+        # Captured up front because progress may be reported from another thread
+        self.task_id = task_id or (task.request.id if task is not None else None)
+        self.every_n_chunks = every_n_chunks
+        self.interval_ms = interval_ms
+        self._last_current = 0
+        self._last_time = 0.0
+
+    def _send(self, event: Dict[str, Any]):
+        try:
+            get_redis_client().publish(self.channel, json.dumps(event))
+        except redis.RedisError as e:
+            # Progress is best effort and must never fail the ingestion itself
+            logging.warning(f"Failed to publish progress for document {self.document_id}: {e}")
+
+    def progress(self, current: int, total: Optional[int] = None, force: bool = False):
+        now = time.monotonic()
+        if not force and (
+            current - self._last_current < self.every_n_chunks
+            and (now - self._last_time) * 1000 < self.interval_ms
+        ):
+            return
+        self._last_current = current
+        self._last_time = now
+
+        self._send({
+            "type": "progress",
+            "document_id": self.document_id,
+            "current": current,
+            "total": total,
+        })
+        if self.task is not None and self.task_id:
+            self.task.update_state(
+                task_id=self.task_id, state='PROGRESS', meta={'current': current, 'total': total}
+            )
+
+    def status(self, status: str, **extra: Any):
+        self._send({
+            "type": "status",
+            "document_id": self.document_id,
+            "status": status,
+            **extra,
+        })
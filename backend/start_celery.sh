@@ -1,7 +1,9 @@
 #!/bin/bash
 
-# Activate the virtual environment
-source .venv/bin/activate
+# Activate the virtual environment, if there is one (the Docker image installs globally)
+if [ -f .venv/bin/activate ]; then
+  source .venv/bin/activate
+fi
 
 # Set ENV_STAGE to 1 if it is not already set or if no argument is provided
 : ${ENV_STAGE:=0}
@@ -24,9 +26,25 @@ else
   exit 1
 fi
 
-# Run celery with the specified log level
+# Worker settings of the ingestion queues (INGEST_*_QUEUE in src/constants.py)
+# and of the general queue, which is CELERY_QUEUE_NAME there
+: ${QUEUE_NAME:=default}
+: ${INGEST_TEXT_CONCURRENCY:=4}
+: ${INGEST_TEXT_PREFETCH:=4}
+: ${INGEST_MEDIA_CONCURRENCY:=2}
+: ${INGEST_MEDIA_PREFETCH:=1}
+
+# Run one worker per ingestion queue so media backlog never delays text documents
 if [ -x "$(command -v celery)" ]; then
-  celery -A src worker -l "$LOG_LEVEL"
+  celery -A src worker -l "$LOG_LEVEL" -n "text@%h" \
+    -Q "ingest.text,$QUEUE_NAME" \
+    --concurrency="$INGEST_TEXT_CONCURRENCY" \
+    --prefetch-multiplier="$INGEST_TEXT_PREFETCH" &
+  celery -A src worker -l "$LOG_LEVEL" -n "media@%h" \
+    -Q ingest.media \
+    --concurrency="$INGEST_MEDIA_CONCURRENCY" \
+    --prefetch-multiplier="$INGEST_MEDIA_PREFETCH" &
+  wait
 else
   echo 'Error: celery could not be found' >&2
   exit 1
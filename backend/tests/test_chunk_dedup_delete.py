@@ -0,0 +1,52 @@
+import uuid
+import pytest
+from src.database.flat_vector_store import FlatVectorDB
+from src.database.manager import DatabaseManager
+from src.database.vector_store import QdrantVectorDB
+
+
+@pytest.fixture(params=["flat", "qdrant"])
+def db_manager(request, tmp_path):
+    if request.param == "flat":
+        vector_db = FlatVectorDB(str(tmp_path / "vectors"))
+    else:
+        vector_db = QdrantVectorDB(":memory:")
+    return DatabaseManager(str(tmp_path / "test.db"), vector_db)
+
+
+def add_document(db_manager, knowledge_base_id, file_name):
+    document_id, _, _ = db_manager.add_document(knowledge_base_id, file_name, "application/pdf", f"uploads/{file_name}")
+    return document_id
+
+
+def test_surviving_duplicate_takes_over_vector_payload(db_manager):
+    user_id = db_manager.create_user("user", "user@example.com", "hash")
+    knowledge_base_id = db_manager.create_knowledge_base(user_id, "Notes", "").id
+    first = add_document(db_manager, knowledge_base_id, "first.pdf")
+    second = add_document(db_manager, knowledge_base_id, "second.pdf")
+
+    vector_id = str(uuid.uuid4())
+    db_manager.add_document_chunks(first, [{
+        "chunk_index": 0,
+        "content": "Shared disclaimer, first copy",
+        "vector": [1.0, 0.0, 0.0],
+        "vector_id": vector_id,
+        "metadata": {"file_name": "first.pdf", "page_label": "1"},
+    }])
+    [duplicate_id] = db_manager.add_document_chunks(second, [{
+        "chunk_index": 0,
+        "content": "Shared disclaimer, second copy",
+        "duplicate_of": vector_id,
+        "metadata": {"file_name": "second.pdf", "page_label": "7"},
+    }])
+
+    db_manager.delete_document(first)
+
+    [hit] = db_manager.vector_db.search_vectors(f"kb_{knowledge_base_id}", [1.0, 0.0, 0.0], limit=5)
+    assert hit.payload == {
+        "document_chunk_id": duplicate_id,
+        "text": "Shared disclaimer, second copy",
+        "metadata": {"file_name": "second.pdf", "page_label": "7"},
+    }
+    [chunk] = db_manager.get_document_chunks(second)
+    assert chunk.duplicate_of is None
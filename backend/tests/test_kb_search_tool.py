@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock
+from qdrant_client.http import models
+from src.database.qdrant_profiles import QdrantProfiles
+from src.database.vector_store import QdrantVectorDB
+from src.tools.kb_search_tool import _load_vector_db_search_tool
+
+
+class FakeEmbedding:
+    def get_query_embedding(self, query: str):
+        return [0.1, 0.2, 0.3]
+
+
+def make_qdrant_db(profiles: QdrantProfiles) -> QdrantVectorDB:
+    db = QdrantVectorDB(":memory:", profiles=profiles)
+    db.client = MagicMock()
+    db.client.collection_exists.return_value = True
+    info = db.client.get_collection.return_value
+    info.config.params.vectors.size = 3
+    info.config.params.vectors.distance = models.Distance.COSINE
+    info.payload_schema = {}
+    return db
+
+
+def test_search_params_of_collection_profile_reach_qdrant():
+    profiles = QdrantProfiles(
+        {"fast": {"search_ef": 128, "quantization": {"type": "scalar", "rescore": False, "oversampling": 2.0}}},
+        collections={"kb_1": "fast"},
+    )
+    db = make_qdrant_db(profiles)
+    db.client.search.return_value = [
+        models.ScoredPoint(
+            id="a",
+            version=0,
+            score=0.9,
+            payload={
+                "document_chunk_id": 7,
+                "text": "what the lecture says",
+                "metadata": {"file_name": "lecture.mp4", "video_path": "uploads/0f_lecture.mp4"},
+            },
+        )
+    ]
+
+    tool = _load_vector_db_search_tool(FakeEmbedding(), db, "kb_1")
+    response = tool.fn("lecture", num_sources=3)
+
+    kwargs = db.client.search.call_args.kwargs
+    assert kwargs["collection_name"] == "kb_1"
+    assert kwargs["limit"] == 3
+    assert kwargs["search_params"] == models.SearchParams(
+        hnsw_ef=128,
+        quantization=models.QuantizationSearchParams(rescore=False, oversampling=2.0),
+    )
+    source = response.source_nodes[0]
+    assert source.url == "lecture.mp4"
+    assert "what the lecture says" in source.text
+    assert "uploads/0f_lecture.mp4" in source.text
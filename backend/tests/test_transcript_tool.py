@@ -0,0 +1,46 @@
+import os
+import uuid
+from unittest.mock import MagicMock
+import pytest
+from src.database.manager import DatabaseManager
+from src.tools.transcript_tool import load_transcript_tool
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    return DatabaseManager(str(tmp_path / "test.db"), MagicMock())
+
+
+@pytest.fixture
+def video_document(db_manager):
+    user_id = db_manager.create_user("user", "user@example.com", "hash")
+    knowledge_base_id = db_manager.create_knowledge_base(user_id, "Lectures", "").id
+    # Stored the way upload_document names uploads
+    file_path = os.path.join("uploads", f"{uuid.uuid4().hex}_lecture_1.mp4")
+    document_id, _, _ = db_manager.add_document(knowledge_base_id, "lecture_1.mp4", "video/mp4", file_path)
+    db_manager.replace_transcript_segments(document_id, [
+        {"start": 0.0, "end": 5.0, "text": "Welcome to the course."},
+        {"start": 5.0, "end": 12.0, "text": "Today we cover sorting."},
+    ])
+    return knowledge_base_id, file_path
+
+
+@pytest.mark.parametrize("video", ["stored_path", "stored_name", "lecture_1.mp4"])
+def test_transcript_found_by_retrieved_video_path(db_manager, video_document, video):
+    knowledge_base_id, file_path = video_document
+    video = {"stored_path": file_path, "stored_name": os.path.basename(file_path)}.get(video, video)
+    tool = load_transcript_tool({"knowledge_base_id": knowledge_base_id}, db_manager)
+
+    transcript = tool.fn(video, "00:04", "00:10")
+
+    assert transcript == (
+        "[00:00:00 - 00:00:05] Welcome to the course.\n"
+        "[00:00:05 - 00:00:12] Today we cover sorting."
+    )
+
+
+def test_unknown_video_is_reported(db_manager, video_document):
+    knowledge_base_id, _ = video_document
+    tool = load_transcript_tool({"knowledge_base_id": knowledge_base_id}, db_manager)
+
+    assert "not found" in tool.fn("uploads/other.mp4", "00:00", "00:10")
@@ -0,0 +1,90 @@
+import hashlib
+import os
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+from api.utils.upload import receive_upload_file
+
+MAX_SIZE = 1024 * 1024
+BOUNDARY = "test-boundary"
+
+
+@pytest.fixture
+def upload_dir(tmp_path):
+    return tmp_path
+
+
+@pytest.fixture
+def client(upload_dir):
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        def destination(file_name: str) -> str:
+            if not file_name.endswith(".pdf"):
+                raise HTTPException(status_code=400, detail="File type not allowed")
+            return os.path.join(upload_dir, file_name)
+
+        received = await receive_upload_file(request, destination, max_size=MAX_SIZE, chunk_size=4096)
+        return {"filename": received.filename, "size": received.size, "content_hash": received.content_hash}
+
+    return TestClient(app)
+
+
+def multipart_body(file_name: str, size: int, piece: int = 64 * 1024):
+    yield (
+        f"--{BOUNDARY}\r\n"
+        f'Content-Disposition: form-data; name="file"; filename="{file_name}"\r\n'
+        "Content-Type: application/pdf\r\n\r\n"
+    ).encode()
+    for start in range(0, size, piece):
+        yield b"x" * min(piece, size - start)
+    yield f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+def test_upload_is_stored_with_size_and_hash(client, upload_dir):
+    content = os.urandom(300 * 1024)
+
+    response = client.post("/upload", files={"file": ("notes.pdf", content, "application/pdf")})
+
+    assert response.status_code == 200
+    assert response.json() == {
+        "filename": "notes.pdf",
+        "size": len(content),
+        "content_hash": hashlib.sha256(content).hexdigest(),
+    }
+    assert (upload_dir / "notes.pdf").read_bytes() == content
+    assert os.listdir(upload_dir) == ["notes.pdf"]
+
+
+def test_oversized_content_length_is_refused_before_reading(client, upload_dir):
+    response = client.post(
+        "/upload",
+        content=b"",
+        headers={
+            "content-type": f"multipart/form-data; boundary={BOUNDARY}",
+            "content-length": str(10 * MAX_SIZE),
+        },
+    )
+
+    assert response.status_code == 413
+    assert os.listdir(upload_dir) == []
+
+
+def test_oversized_stream_is_aborted_without_leftovers(client, upload_dir):
+    # A generator body is sent chunked, without Content-Length
+    response = client.post(
+        "/upload",
+        content=multipart_body("big.pdf", 2 * MAX_SIZE),
+        headers={"content-type": f"multipart/form-data; boundary={BOUNDARY}"},
+    )
+
+    assert response.status_code == 413
+    assert os.listdir(upload_dir) == []
+
+
+def test_rejected_file_name_is_not_stored(client, upload_dir):
+    response = client.post("/upload", files={"file": ("script.sh", b"echo hi", "text/plain")})
+
+    assert response.status_code == 400
+    assert os.listdir(upload_dir) == []
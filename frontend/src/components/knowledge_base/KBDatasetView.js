@@ -37,6 +37,10 @@ const ALLOWED_FILE_TYPES = [
   ".xml",
   ".rtf",
   ".mp4",
+  ".mp3",
+  ".m4a",
+  ".wav",
+  ".ogg",
 ];
 
 const DatasetView = ({ knowledgeBaseID }) => {